@@ -0,0 +1,88 @@
+import math
+import threading
+from collections import Counter, deque
+
+# Etapas medidas: (timeout por defecto, mínimo, máximo) en segundos
+ETAPAS = {
+    'conexion':  (5, 1.5, 5),     # Hasta recibir cabeceras: presupuesto de fallo rápido
+    'http':      (10, 3, 20),     # Descarga HTTP completa
+    'navegador': (15, 5, 30),     # Carga de página con Selenium
+}
+
+PERCENTIL     = 95     # Percentil de latencia observada que debe cubrir el timeout
+MARGEN        = 1.5    # Multiplicador sobre ese percentil
+MIN_MUESTRAS  = 20     # Muestras necesarias antes de abandonar el valor por defecto
+VENTANA       = 500    # Últimas muestras consideradas por etapa
+RECALCULAR    = 10     # Recalcular el timeout cada N muestras nuevas
+
+
+def percentil(valores, p: float) -> float:
+    """Percentil `p` (0-100) por el método del rango más cercano; 0.0 si no hay valores."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+class AdaptiveTimeouts:
+    """
+    Timeouts por etapa derivados de la latencia observada durante la ejecución.
+    - `registrar(etapa, segundos)` añade una medida de una carga que terminó.
+    - `timeout(etapa)` devuelve percentil * margen, acotado al rango de la etapa
+      (el valor por defecto hasta reunir `MIN_MUESTRAS`).
+    - `registrar_agotado(etapa)` cuenta las filas que agotaron el timeout.
+    """
+
+    def __init__(self, etapas: dict = ETAPAS, percentil: float = PERCENTIL, margen: float = MARGEN):
+        self.etapas = dict(etapas)
+        self.percentil = percentil
+        self.margen = margen
+        self._lock = threading.Lock()
+        self._muestras = {etapa: deque(maxlen=VENTANA) for etapa in self.etapas}
+        self._nuevas = Counter()
+        self._actual = {etapa: float(por_defecto) for etapa, (por_defecto, _, _) in self.etapas.items()}
+        self.agotados = Counter()
+
+    def registrar(self, etapa: str, segundos: float):
+        with self._lock:
+            self._muestras[etapa].append(segundos)
+            self._nuevas[etapa] += 1
+            if self._nuevas[etapa] >= RECALCULAR:
+                self._nuevas[etapa] = 0
+                self._recalcular(etapa)
+
+    def _recalcular(self, etapa: str):
+        """Actualiza el timeout de la etapa (llamar con el lock)."""
+        muestras = self._muestras[etapa]
+        if len(muestras) < MIN_MUESTRAS:
+            return
+        _, minimo, maximo = self.etapas[etapa]
+        valor = percentil(muestras, self.percentil) * self.margen
+        self._actual[etapa] = min(maximo, max(minimo, valor))
+
+    def timeout(self, etapa: str) -> float:
+        with self._lock:
+            return self._actual[etapa]
+
+    def registrar_agotado(self, etapa: str):
+        with self._lock:
+            self.agotados[etapa] += 1
+
+    def resumen(self) -> dict:
+        """Por etapa: muestras, p50, p95, timeout vigente y filas que lo agotaron."""
+        with self._lock:
+            return {
+                etapa: {
+                    'muestras': len(self._muestras[etapa]),
+                    'p50': percentil(self._muestras[etapa], 50),
+                    'p95': percentil(self._muestras[etapa], 95),
+                    'timeout': self._actual[etapa],
+                    'agotados': self.agotados[etapa],
+                }
+                for etapa in self.etapas
+            }
+
+
+# Timeouts compartidos por toda la ejecución
+TIMEOUTS = AdaptiveTimeouts()
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from extractor.page_fetcher import es_url_http
+from extractor.http_fetcher import (
+    USER_AGENT,
+    MAX_BYTES_HTML,
+    ESTADOS_NAVEGADOR,
+    decodificar_html,
+    snapshot_from_html,
+    snapshot_vacio,
+    necesita_navegador,
+    contar_camino,
+)
+from extractor.host_scheduler import HOST_SCHEDULER
+from extractor.adaptive_timeouts import TIMEOUTS
+
+# Parámetros del motor asíncrono
+CONCURRENCIA      = 200   # Descargas simultáneas en vuelo
+LIMITE_POR_HOST   = 4     # Conexiones simultáneas contra un mismo host
+HILOS_EXTRACCION  = 32    # Hilos para la verificación de emails (DNS bloqueante)
+
+
+async def _descargar(session: aiohttp.ClientSession, url: str):
+    """
+    Descarga la URL y devuelve un PageSnapshot, o None si hay que recurrir al navegador
+    (un error HTTP definitivo, como 404, da un snapshot vacío).
+    Propaga los errores de conexión y timeout (sitio caído).
+    """
+    conexion, lectura = TIMEOUTS.timeout('conexion'), TIMEOUTS.timeout('http')
+    timeout = aiohttp.ClientTimeout(sock_connect=conexion, sock_read=lectura, total=conexion + lectura)
+    fase = 'conexion'
+    inicio = time.monotonic()
+    try:
+        async with session.get(url, allow_redirects=True, timeout=timeout) as resp:
+            TIMEOUTS.registrar('conexion', time.monotonic() - inicio)
+            fase = 'http'
+            HOST_SCHEDULER.registrar_respuesta(url, resp.status, resp.headers.get("Retry-After"))
+            content_type = resp.headers.get("Content-Type", "").lower()
+            if resp.status >= 400:
+                # Mismo criterio que fetch_page_http: solo algunos errores justifican el navegador
+                if resp.status in ESTADOS_NAVEGADOR:
+                    return None
+                return snapshot_vacio(url, str(resp.url), resp.status)
+            if content_type and "html" not in content_type:
+                return None
+
+            contenido = bytearray()
+            async for bloque in resp.content.iter_chunked(64 * 1024):
+                contenido.extend(bloque)
+                if len(contenido) >= MAX_BYTES_HTML:
+                    break
+            html = decodificar_html(bytes(contenido), resp.headers.get("Content-Type", ""))
+            TIMEOUTS.registrar('http', time.monotonic() - inicio)
+            snapshot = snapshot_from_html(url, str(resp.url), html, status=resp.status)
+            return None if necesita_navegador(snapshot) else snapshot
+    except aiohttp.ClientSSLError:
+        # Certificados problemáticos: el navegador decide
+        return None
+    except asyncio.TimeoutError:
+        TIMEOUTS.registrar_agotado(fase)
+        raise
+    except aiohttp.ClientConnectionError:
+        raise
+    except aiohttp.ClientError:
+        return None
+
+
+async def _procesar_fila(row, session, loop, procesar, fallback_navegador, navegador_executor, extraccion_executor):
+    url = row.get('website')
+    url = url.strip() if isinstance(url, str) else url
+    if not es_url_http(url):
+        return await loop.run_in_executor(extraccion_executor, procesar, row, None)
+
+    try:
+        # Respetar la pausa del host (429/5xx) sin bloquear el bucle de eventos
+        espera = HOST_SCHEDULER.espera_pendiente(url)
+        if espera > 0:
+            await asyncio.sleep(espera)
+        snapshot = await _descargar(session, url)
+        if snapshot is not None:
+            contar_camino("http")
+        else:
+            espera = HOST_SCHEDULER.espera_pendiente(url)
+            if espera > 0:
+                await asyncio.sleep(espera)
+            snapshot = await loop.run_in_executor(navegador_executor, fallback_navegador, url)
+            contar_camino("selenium")
+    except Exception:
+        contar_camino("error")
+        snapshot = None
+
+    return await loop.run_in_executor(extraccion_executor, procesar, row, snapshot)
+
+
+async def _crawl(rows, procesar, fallback_navegador, navegador_executor, concurrencia, limite_por_host, al_terminar):
+    loop = asyncio.get_running_loop()
+    resultados = {}
+    # Cola acotada: la memoria depende de la concurrencia, no del tamaño del fichero
+    cola = asyncio.Queue(maxsize=concurrencia * 2)
+
+    # Los timeouts se fijan por petición (adaptativos, ver _descargar)
+    connector = aiohttp.TCPConnector(limit=concurrencia, limit_per_host=limite_por_host, ttl_dns_cache=300)
+
+    # `al_terminar` escribe en el diario y puede esperar a otras etapas: nunca en el hilo del bucle.
+    # Un único hilo escritor mantiene las escrituras en serie.
+    with ThreadPoolExecutor(max_workers=HILOS_EXTRACCION) as extraccion_executor, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor") as escritor_executor:
+        async with aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8"},
+        ) as session:
+
+            async def trabajador():
+                while True:
+                    item = await cola.get()
+                    if item is None:
+                        cola.task_done()
+                        return
+                    idx, row = item
+                    try:
+                        resultado = await _procesar_fila(
+                            row, session, loop, procesar, fallback_navegador,
+                            navegador_executor, extraccion_executor
+                        )
+                    except Exception:
+                        resultado = await loop.run_in_executor(extraccion_executor, procesar, row, None)
+                    try:
+                        if al_terminar is not None:
+                            await loop.run_in_executor(escritor_executor, al_terminar, idx, resultado)
+                        else:
+                            resultados[idx] = resultado
+                    finally:
+                        cola.task_done()
+
+            trabajadores = [asyncio.create_task(trabajador()) for _ in range(concurrencia)]
+            # `rows` puede hacer trabajo bloqueante (lectura por bloques, preflight): se consume fuera del bucle
+            filas = iter(rows)
+            fin = object()
+            idx = 0
+            while True:
+                row = await loop.run_in_executor(None, next, filas, fin)
+                if row is fin:
+                    break
+                await cola.put((idx, row))
+                idx += 1
+            for _ in trabajadores:
+                await cola.put(None)
+            await asyncio.gather(*trabajadores)
+
+    if al_terminar is not None:
+        return None
+    return [resultados[i] for i in range(len(resultados))]
+
+
+def ejecutar_crawl_async(
+    rows,
+    procesar,
+    fallback_navegador,
+    navegador_executor=None,
+    concurrencia: int = CONCURRENCIA,
+    limite_por_host: int = LIMITE_POR_HOST,
+    al_terminar=None,
+):
+    """
+    Procesa las filas con un motor asyncio de alta concurrencia.
+    - rows: iterable de dicts con la clave 'website' (puede ser un generador).
+    - procesar: función (row, snapshot) -> dict de resultado; snapshot es None si la carga falló.
+      Es la misma lógica de extracción que usa el camino por hilos.
+    - fallback_navegador: función url -> PageSnapshot con Selenium, para páginas renderizadas por JS.
+    - navegador_executor: executor donde corre el respaldo Selenium (bloquea esperando navegador).
+    - concurrencia: descargas simultáneas en vuelo.
+    - limite_por_host: conexiones simultáneas por host.
+    - al_terminar: función opcional (índice, resultado) llamada en cuanto termina cada fila,
+      en un hilo escritor aparte (puede bloquear sin frenar el bucle de eventos);
+      si se pasa, los resultados no se acumulan en memoria.
+
+    Retorna la lista de resultados en el mismo orden que `rows` (None si se usa `al_terminar`).
+    """
+    return asyncio.run(
+        _crawl(rows, procesar, fallback_navegador, navegador_executor, concurrencia, limite_por_host, al_terminar)
+    )
@@ -0,0 +1,180 @@
+import logging
+import queue
+import threading
+import psutil
+
+from extractor.utils import setup_driver
+
+# Parámetros por defecto del pool
+TAMANO_POOL     = 4      # Navegadores simultáneos
+MAX_PAGINAS     = 200    # Reciclar el navegador tras N páginas
+MAX_RSS_MB      = 1500   # Reciclar si chromedriver + Chrome superan este consumo
+DEADLINE_SITIO  = 60     # Segundos máximos por sitio antes de matar la sesión
+
+
+class _Navegador:
+    """Driver del pool con su contador de páginas y estado."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.paginas = 0
+        self.roto = False
+
+    def proceso(self):
+        """Proceso de chromedriver (padre de los procesos de Chrome), si se conoce."""
+        try:
+            return psutil.Process(self.driver.service.process.pid)
+        except Exception:
+            return None
+
+    def rss_mb(self) -> float:
+        proc = self.proceso()
+        if proc is None:
+            return 0.0
+        total = 0
+        try:
+            for p in [proc] + proc.children(recursive=True):
+                try:
+                    total += p.memory_info().rss
+                except psutil.Error:
+                    pass
+        except psutil.Error:
+            return 0.0
+        return total / (1024 * 1024)
+
+    def matar(self):
+        """Mata chromedriver y sus Chrome: cualquier llamada WebDriver en curso falla al instante."""
+        self.roto = True
+        proc = self.proceso()
+        if proc is None:
+            return
+        try:
+            for p in proc.children(recursive=True) + [proc]:
+                try:
+                    p.kill()
+                except psutil.Error:
+                    pass
+        except psutil.Error:
+            pass
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Selenium que vive durante toda la ejecución (todos los ficheros).
+    - Crea los drivers bajo demanda, como mucho `tamano` a la vez.
+    - Recicla un driver tras `max_paginas` páginas o si su RSS supera `max_rss_mb`.
+    - Comprueba la sesión antes de prestarla y sustituye los drivers muertos.
+    - `ejecutar` impone un deadline duro por sitio: si se supera, mata la sesión colgada.
+    """
+
+    def __init__(
+        self,
+        tamano: int = TAMANO_POOL,
+        max_paginas: int = MAX_PAGINAS,
+        max_rss_mb: int = MAX_RSS_MB,
+        deadline: int = DEADLINE_SITIO,
+        factory=setup_driver,
+    ):
+        self.max_paginas = max_paginas
+        self.max_rss_mb = max_rss_mb
+        self.deadline = deadline
+        self.factory = factory
+        self._libres = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(tamano)
+        self._lock = threading.Lock()
+        self._todos = set()
+        self.stats = {'creados': 0, 'reciclados': 0, 'muertos': 0, 'deadlines': 0}
+
+    # ---------------- Préstamo ----------------
+    def _sano(self, nav: _Navegador) -> bool:
+        if nav.roto:
+            return False
+        try:
+            return nav.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def adquirir(self) -> _Navegador:
+        """Presta un navegador sano (bloquea si todos están ocupados)."""
+        self._cupos.acquire()
+        try:
+            while True:
+                try:
+                    nav = self._libres.get_nowait()
+                except queue.Empty:
+                    nav = _Navegador(self.factory())
+                    with self._lock:
+                        self._todos.add(nav)
+                        self.stats['creados'] += 1
+                    return nav
+                if self._sano(nav):
+                    return nav
+                with self._lock:
+                    self.stats['muertos'] += 1
+                self._destruir(nav)
+        except Exception:
+            self._cupos.release()
+            raise
+
+    def liberar(self, nav: _Navegador):
+        """Devuelve el navegador al pool, o lo destruye si está roto o toca reciclarlo."""
+        try:
+            if nav.roto:
+                self._destruir(nav)
+            elif nav.paginas >= self.max_paginas or nav.rss_mb() > self.max_rss_mb:
+                with self._lock:
+                    self.stats['reciclados'] += 1
+                self._destruir(nav)
+            else:
+                self._libres.put(nav)
+        finally:
+            self._cupos.release()
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        """
+        Ejecuta `funcion(driver, *args, **kwargs)` con un navegador del pool.
+        Si tarda más que el deadline, se mata la sesión y la llamada lanza una excepción;
+        el driver muerto se sustituye de forma transparente en el siguiente préstamo.
+        """
+        nav = self.adquirir()
+        vigilante = threading.Timer(self.deadline, self._deadline_superado, args=(nav,))
+        vigilante.daemon = True
+        vigilante.start()
+        try:
+            nav.paginas += 1
+            return funcion(nav.driver, *args, **kwargs)
+        except Exception:
+            # Una excepción de WebDriver puede dejar la sesión inservible: se comprueba al prestarla
+            if not self._sano(nav):
+                nav.roto = True
+            raise
+        finally:
+            vigilante.cancel()
+            self.liberar(nav)
+
+    def _deadline_superado(self, nav: _Navegador):
+        with self._lock:
+            self.stats['deadlines'] += 1
+        logging.warning(f"Deadline de {self.deadline}s superado: se mata la sesión del navegador")
+        nav.matar()
+
+    # ---------------- Cierre ----------------
+    def _destruir(self, nav: _Navegador):
+        with self._lock:
+            self._todos.discard(nav)
+        try:
+            nav.driver.quit()
+        except Exception:
+            nav.matar()
+
+    def cerrar(self):
+        """Cierra todos los navegadores del pool."""
+        with self._lock:
+            todos = list(self._todos)
+        for nav in todos:
+            self._destruir(nav)
+        while not self._libres.empty():
+            try:
+                self._libres.get_nowait()
+            except queue.Empty:
+                break
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RUTA_JOURNAL = BASE_DIR / "data" / "checkpoints" / "journal.sqlite"
+
+
+class CheckpointJournal:
+    """
+    Diario duradero (SQLite) de filas ya procesadas, por fichero de entrada y número de fila.
+    Permite reanudar una ejecución interrumpida saltando las filas terminadas y
+    construir el Excel final a partir de lo registrado.
+    """
+
+    def __init__(self, ruta: Path = RUTA_JOURNAL):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.ruta), check_same_thread=False)
+        # WAL + NORMAL: cada fila queda en disco sin un fsync por commit
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS filas (
+                archivo   TEXT    NOT NULL,
+                fila      INTEGER NOT NULL,
+                resultado TEXT    NOT NULL,
+                PRIMARY KEY (archivo, fila)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def registrar(self, archivo: str, fila: int, resultado: dict):
+        """Guarda (o reemplaza) el resultado de una fila."""
+        datos = json.dumps(resultado, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO filas (archivo, fila, resultado) VALUES (?, ?, ?)",
+                (archivo, fila, datos),
+            )
+            self._conn.commit()
+
+    def filas_hechas(self, archivo: str) -> set:
+        """Números de fila ya registrados para `archivo`."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT fila FROM filas WHERE archivo = ?", (archivo,))
+            return {fila for (fila,) in cursor.fetchall()}
+
+    def resultados(self, archivo: str):
+        """Itera los resultados de `archivo` en orden de fila, sin cargarlos todos en memoria."""
+        # Conexión de solo lectura propia: no bloquea a los hilos que siguen registrando
+        lectura = sqlite3.connect(str(self.ruta))
+        try:
+            cursor = lectura.execute(
+                "SELECT resultado FROM filas WHERE archivo = ? ORDER BY fila", (archivo,)
+            )
+            for (datos,) in cursor:
+                yield json.loads(datos)
+        finally:
+            lectura.close()
+
+    def borrar(self, archivo: str):
+        """Elimina las filas de `archivo` (una vez generado su Excel)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM filas WHERE archivo = ?", (archivo,))
+            self._conn.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
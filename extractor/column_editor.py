@@ -1,5 +1,8 @@
 import pandas as pd
 import os
+import shutil
+
+from extractor.column_plan import renombrar_cabecera
 
 def modificar_columnas_csv(
     ruta_entrada: str,
@@ -16,6 +19,18 @@ def modificar_columnas_csv(
     :param renombrar_columnas: Diccionario con columnas a renombrar.
     """
     try:
+        if ruta_salida is None:
+            ruta_salida = ruta_entrada
+
+        # Camino rápido: sin reordenar no hace falta parsear las filas
+        if not nuevo_orden:
+            if renombrar_columnas:
+                renombrar_cabecera(ruta_entrada, ruta_salida, renombrar_columnas)
+            elif os.path.abspath(ruta_salida) != os.path.abspath(ruta_entrada):
+                shutil.copyfile(ruta_entrada, ruta_salida)
+            print(f"✅ Archivo guardado en: {ruta_salida}")
+            return
+
         df = pd.read_csv(ruta_entrada)
 
         if renombrar_columnas:
@@ -28,9 +43,6 @@ def modificar_columnas_csv(
                 raise ValueError(f"Las siguientes columnas no existen en el archivo: {columnas_faltantes}")
             df = df[nuevo_orden]
 
-        if ruta_salida is None:
-            ruta_salida = ruta_entrada
-
         df.to_csv(ruta_salida, index=False)
         print(f"✅ Archivo guardado en: {ruta_salida}")
     except Exception as e:
@@ -0,0 +1,112 @@
+import codecs
+import csv
+import io
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TXT_CONFIG_DIR = BASE_DIR / "config" / "txt_config"
+
+# Columnas que el pipeline necesita aunque el orden de salida no las incluya
+COLUMNAS_PROTEGIDAS = ("website",)
+
+
+def cargar_lista_desde_txt(nombre_archivo, carpeta=TXT_CONFIG_DIR) -> list:
+    ruta = os.path.join(carpeta, nombre_archivo)
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+@dataclass
+class PlanColumnas:
+    """
+    Plan declarativo de columnas, cargado una vez desde config/txt_config:
+    - eliminar: columnas que nunca se leen (columnas_a_eliminar.txt).
+    - renombrar: {antigua: nueva} (renombrar_columnas.txt, formato "antigua:nueva").
+    - orden: orden de las columnas de salida (orden_columnas.txt).
+
+    La primera lectura de cada fichero aplica `proyeccion` (usecols) y `renombres`;
+    el orden se aplica al escribir la salida, cuando ya existen las columnas de resultados.
+    """
+    eliminar: list = field(default_factory=list)
+    renombrar: dict = field(default_factory=dict)
+    orden: list = field(default_factory=list)
+
+    @classmethod
+    def desde_config(cls, carpeta=TXT_CONFIG_DIR) -> "PlanColumnas":
+        renombrar = {}
+        for line in cargar_lista_desde_txt("renombrar_columnas.txt", carpeta):
+            if ":" in line:
+                old, new = line.split(":", 1)
+                renombrar[old.strip()] = new.strip()
+        return cls(
+            eliminar=cargar_lista_desde_txt("columnas_a_eliminar.txt", carpeta),
+            renombrar=renombrar,
+            orden=cargar_lista_desde_txt("orden_columnas.txt", carpeta),
+        )
+
+    def nombre_final(self, columna: str) -> str:
+        return self.renombrar.get(columna, columna)
+
+    def proyeccion(self, cabecera) -> list:
+        """
+        Columnas de `cabecera` que hay que leer, en su orden original: sin las eliminadas y,
+        si hay orden de salida que afecte al fichero, solo las que llegarán a la salida.
+        """
+        columnas = [c for c in cabecera if c not in self.eliminar]
+        if self.orden:
+            en_orden = [c for c in columnas if self.nombre_final(c) in self.orden]
+            if en_orden:
+                columnas = [c for c in columnas if c in en_orden or c in COLUMNAS_PROTEGIDAS]
+        return columnas
+
+    def renombres(self, cabecera) -> dict:
+        """Renombrados que afectan a `cabecera`."""
+        return {c: self.renombrar[c] for c in cabecera if c in self.renombrar}
+
+    def solo_renombra(self, cabecera) -> bool:
+        """True si el plan no quita columnas de `cabecera` (basta con reescribir la cabecera)."""
+        return self.proyeccion(cabecera) == list(cabecera)
+
+    def ordenar(self, df):
+        """Aplica renombrado y el orden de salida a un DataFrame de resultados."""
+        if self.renombrar:
+            df = df.rename(columns=self.renombrar)
+        if self.orden:
+            cols_validas = [c for c in self.orden if c in df.columns]
+            if cols_validas:
+                df = df.reindex(columns=cols_validas)
+        return df
+
+
+def leer_cabecera(ruta, encoding="utf-8-sig") -> list:
+    """Nombres de columna de un CSV leyendo solo su primera línea (sin BOM, como `read_csv`)."""
+    with open(ruta, 'r', encoding=encoding, newline='') as f:
+        return next(csv.reader([f.readline()]), [])
+
+
+def renombrar_cabecera(origen, destino, renombres: dict, encoding="utf-8"):
+    """
+    Camino rápido para renombrados puros: reescribe solo la línea de cabecera
+    y copia el resto del fichero byte a byte, sin parsear las filas.
+    `origen` y `destino` pueden ser el mismo fichero.
+    """
+    origen, destino = Path(origen), Path(destino)
+    temporal = destino.with_name(destino.name + ".tmp")
+    with open(origen, 'rb') as entrada:
+        primera = entrada.readline()
+        # El BOM no forma parte del nombre de la primera columna (y la salida va sin BOM, como `to_csv`)
+        if primera.startswith(codecs.BOM_UTF8):
+            primera = primera[len(codecs.BOM_UTF8):]
+        cabecera = next(csv.reader([primera.decode(encoding)]), [])
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='').writerow([renombres.get(c, c) for c in cabecera])
+        fin_linea = primera[len(primera.rstrip(b'\r\n')):]
+        with open(temporal, 'wb') as salida:
+            salida.write(buffer.getvalue().encode(encoding) + fin_linea)
+            shutil.copyfileobj(entrada, salida, 1024 * 1024)
+    os.replace(temporal, destino)
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RUTA_CACHE_DNS = BASE_DIR / "data" / "cache" / "dns_cache.json"
+
+# Parámetros por defecto
+MAX_ENTRADAS = 50000     # Entradas (nombre, tipo) en memoria
+TTL_MIN      = 300       # Segundos: suelo para TTLs muy cortos
+TTL_MAX      = 86400     # Segundos: techo para TTLs muy largos
+TTL_NEGATIVO = 3600      # NXDOMAIN / sin respuesta
+TTL_ERROR    = 60        # Timeouts y fallos transitorios
+
+
+class DNSCache:
+    """
+    Caché de consultas DNS por (nombre, tipo), compartida por todas las verificaciones.
+    - Respeta el TTL de cada respuesta (acotado entre ttl_min y ttl_max).
+    - Guarda también los resultados negativos (lista vacía).
+    - Tamaño acotado con expulsión LRU.
+    - Opcionalmente persiste en disco entre ejecuciones.
+    """
+
+    def __init__(
+        self,
+        max_entradas: int = MAX_ENTRADAS,
+        ttl_min: int = TTL_MIN,
+        ttl_max: int = TTL_MAX,
+        ttl_negativo: int = TTL_NEGATIVO,
+        ttl_error: int = TTL_ERROR,
+        ruta: Path = None,
+    ):
+        self.max_entradas = max_entradas
+        self.ttl_min = ttl_min
+        self.ttl_max = ttl_max
+        self.ttl_negativo = ttl_negativo
+        self.ttl_error = ttl_error
+        self.ruta = Path(ruta) if ruta else None
+        self.hits = 0
+        self.misses = 0
+        self._datos = OrderedDict()   # (nombre, tipo) -> (valores, expira)
+        self._lock = threading.Lock()
+        self._en_curso = {}           # (nombre, tipo) -> Event, evita consultas duplicadas simultáneas
+
+    # ---------------- Acceso ----------------
+    def obtener(self, nombre: str, tipo: str):
+        """Devuelve la lista cacheada para (nombre, tipo) o None si no está o caducó."""
+        clave = (nombre.lower().rstrip('.'), tipo)
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valores, expira = entrada
+            if expira < time.time():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valores
+
+    def almacenar(self, nombre: str, tipo: str, valores: list, ttl: int):
+        clave = (nombre.lower().rstrip('.'), tipo)
+        with self._lock:
+            self._datos[clave] = (valores, time.time() + ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def resolver(self, nombre: str, tipo: str) -> list:
+        """
+        Resuelve (nombre, tipo) pasando por la caché.
+        Retorna la lista de registros en texto (`rdata.to_text()`); vacía si no existen.
+        """
+        valores = self.obtener(nombre, tipo)
+        if valores is not None:
+            with self._lock:
+                self.hits += 1
+            return valores
+
+        clave = (nombre.lower().rstrip('.'), tipo)
+        with self._lock:
+            evento = self._en_curso.get(clave)
+            propietario = evento is None
+            if propietario:
+                evento = threading.Event()
+                self._en_curso[clave] = evento
+                self.misses += 1
+
+        if not propietario:
+            # Otro hilo ya está consultando lo mismo: esperar su resultado
+            evento.wait()
+            valores = self.obtener(nombre, tipo)
+            if valores is not None:
+                with self._lock:
+                    self.hits += 1
+                return valores
+            return self.resolver(nombre, tipo)
+
+        try:
+            valores, ttl = self._consultar(nombre, tipo)
+            self.almacenar(nombre, tipo, valores, ttl)
+            return valores
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+    async def resolver_async(self, nombre: str, tipo: str) -> list:
+        """
+        Versión asíncrona de `resolver` (dns.asyncresolver); comparte la misma caché.
+        Retorna la lista de registros en texto; vacía si no existen.
+        """
+        valores = self.obtener(nombre, tipo)
+        if valores is not None:
+            with self._lock:
+                self.hits += 1
+            return valores
+
+        with self._lock:
+            self.misses += 1
+        try:
+            respuesta = await dns.asyncresolver.resolve(nombre, tipo)
+            valores, ttl = self._interpretar_respuesta(respuesta)
+        except Exception as e:
+            valores, ttl = self._interpretar_error(e)
+        self.almacenar(nombre, tipo, valores, ttl)
+        return valores
+
+    def _consultar(self, nombre: str, tipo: str):
+        """Consulta la red y devuelve (valores, ttl_a_cachear)."""
+        try:
+            respuesta = dns.resolver.resolve(nombre, tipo)
+            return self._interpretar_respuesta(respuesta)
+        except Exception as e:
+            return self._interpretar_error(e)
+
+    def _interpretar_respuesta(self, respuesta):
+        ttl = min(max(respuesta.rrset.ttl, self.ttl_min), self.ttl_max)
+        return [r.to_text() for r in respuesta], ttl
+
+    def _interpretar_error(self, error):
+        if isinstance(error, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+            return [], self.ttl_negativo
+        if isinstance(error, dns.exception.DNSException):
+            return [], self.ttl_error
+        # Nombres mal formados (p.ej. etiquetas vacías o no codificables)
+        return [], self.ttl_negativo
+
+    # ---------------- Persistencia ----------------
+    def activar_persistencia(self, ruta: Path = RUTA_CACHE_DNS):
+        """Fija el fichero de persistencia y carga las entradas vigentes que contenga."""
+        self.ruta = Path(ruta)
+        self.cargar()
+
+    def cargar(self):
+        """Incorpora las entradas vigentes del fichero; ante una misma clave gana la que caduca más tarde."""
+        if not self.ruta or not self.ruta.exists():
+            return
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                contenido = json.load(f)
+        except (OSError, ValueError):
+            return
+        ahora = time.time()
+        with self._lock:
+            for clave, (valores, expira) in contenido.items():
+                nombre, tipo = clave.rsplit('|', 1)
+                if expira > max(ahora, self._datos.get((nombre, tipo), (None, 0))[1]):
+                    self._datos[(nombre, tipo)] = (valores, expira)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def guardar(self):
+        """
+        Escribe en disco las entradas vigentes (escritura atómica). Antes fusiona lo que haya
+        en el fichero, porque los trabajadores del modo cola guardan cada uno su propia caché.
+        """
+        if not self.ruta:
+            return
+        self.cargar()
+        ahora = time.time()
+        with self._lock:
+            contenido = {
+                f"{nombre}|{tipo}": [valores, expira]
+                for (nombre, tipo), (valores, expira) in self._datos.items()
+                if expira > ahora
+            }
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.ruta.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f)
+        os.replace(tmp, self.ruta)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entradas': len(self._datos)}
+
+
+# Caché compartida por todo el proceso
+DNS_CACHE = DNSCache()
+
+
+def resolver_dns(nombre: str, tipo: str) -> list:
+    """Atajo a DNS_CACHE.resolver."""
+    return DNS_CACHE.resolver(nombre, tipo)
+
+
+async def resolver_dns_async(nombre: str, tipo: str) -> list:
+    """Atajo a DNS_CACHE.resolver_async."""
+    return await DNS_CACHE.resolver_async(nombre, tipo)
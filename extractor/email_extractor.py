@@ -1,11 +1,34 @@
-import re
-from pathlib import Path
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
+from extractor.page_fetcher import PageSnapshot, es_url_http, fetch_page
+from extractor.email_prefilter import extraer_candidatos, filtrar_candidatos
+from extractor.email_verifier import verificar_lote, determinar_estado
 
-from extractor.utils import setup_driver
-from extractor.email_verifier import verificar_existencia_email, determinar_estado
+
+def extract_emails_from_snapshot(
+    snapshot: PageSnapshot,
+    modo_verificacion: str = 'avanzado',
+):
+    """
+    Extrae y verifica emails de una página ya cargada.
+    - snapshot: PageSnapshot devuelto por fetch_page.
+    - modo_verificacion: 'avanzado' o 'ultra-avanzado'.
+
+    Retorna lista de emails válidos.
+    """
+    # Extraer con regex (HTML y mailto:) y descartar candidatos imposibles antes de ir a la red
+    candidatos = extraer_candidatos(snapshot.html, snapshot.hrefs)
+    if snapshot.emails_dom:
+        candidatos.extend(snapshot.emails_dom)
+    raw_emails = filtrar_candidatos(candidatos)
+
+    # Verificación por lote: un solo grupo de consultas DNS concurrentes por dominio
+    verificados = verificar_lote(raw_emails, modo=modo_verificacion)
+    valid_emails = [
+        e for e, resultados in verificados.items()
+        if determinar_estado(resultados, modo=modo_verificacion) == 'Válido'
+    ]
+
+    print(f"🔍 {snapshot.url} → Emails extraídos: {valid_emails}")
+    return valid_emails
 
 
 def extract_emails_from_url(
@@ -23,44 +46,13 @@ def extract_emails_from_url(
 
     Retorna lista de emails válidos.
     """
-    if not url or not isinstance(url, str) or not url.lower().startswith(('http://', 'https://')):
+    if not es_url_http(url):
         print(f"⚠️ URL inválida, saltando: {url}")
         return []
 
-    driver_created = False
-    if driver is None:
-        driver = setup_driver()
-        driver_created = True
-
     try:
-        driver.get(url)
-        # Espera explícita a que el <body> esté presente (carga completa)
-        WebDriverWait(driver, wait_timeout).until(
-            EC.presence_of_element_located((By.TAG_NAME, 'body'))
-        )
-        html = driver.page_source
-
-        # Extraer con regex
-        raw_emails = set(re.findall(
-            r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
-            html
-        ))
-
-        valid_emails = []
-        for e in raw_emails:
-            resultados = verificar_existencia_email(e, modo=modo_verificacion)
-            estado = determinar_estado(resultados, modo=modo_verificacion)
-            if estado == 'Válido':
-                valid_emails.append(e)
-
-        print(f"🔍 {url} → Emails extraídos: {valid_emails}")
-        return valid_emails
-
+        snapshot = fetch_page(url, driver=driver, wait_timeout=wait_timeout)
+        return extract_emails_from_snapshot(snapshot, modo_verificacion=modo_verificacion)
     except Exception as e:
         print(f"❌ Error en {url}: {e}")
         return []
-
-    finally:
-        # Si el driver fue creado aquí, cerrarlo; si se reusa externamente, no tocarlo
-        if driver_created:
-            driver.quit()
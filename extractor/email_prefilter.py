@@ -0,0 +1,109 @@
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from urllib.parse import unquote
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RUTA_TLDS = BASE_DIR / "config" / "txt_config" / "tlds.txt"
+
+# Regex de candidatos (la misma que usaba el extractor)
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+# Sufijos de ficheros que la regex confunde con dominios (logo@2x.png, app@1.2.3.js...)
+EXTENSIONES_ASSET = {
+    'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'avif', 'ico', 'bmp', 'tif', 'tiff',
+    'css', 'js', 'mjs', 'map', 'json', 'xml', 'txt', 'php', 'html', 'htm', 'asp', 'aspx',
+    'woff', 'woff2', 'ttf', 'otf', 'eot',
+    'mp3', 'mp4', 'webm', 'mov', 'avi', 'wav', 'ogg',
+    'pdf', 'zip', 'gz', 'rar',
+}
+
+# Parte local con pinta de hash o identificador de seguimiento (p.ej. Sentry)
+HASH_REGEX = re.compile(r"^[0-9a-f]{16,}$")
+
+# Contadores de candidatos descartados por regla
+_stats_lock = threading.Lock()
+PREFILTRO_STATS = Counter()
+
+_tlds = None
+
+
+def cargar_tlds(ruta: Path = RUTA_TLDS) -> set:
+    """Carga (una vez) el conjunto de TLDs válidos desde la lista offline."""
+    global _tlds
+    if _tlds is None:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            _tlds = {line.strip().lower() for line in f if line.strip() and not line.startswith('#')}
+    return _tlds
+
+
+def _descartar(regla: str, contador: Counter):
+    contador[regla] += 1
+
+
+def resumen_prefiltro() -> dict:
+    """Devuelve una copia de los contadores de descartes por regla."""
+    with _stats_lock:
+        return dict(PREFILTRO_STATS)
+
+
+def extraer_candidatos(html: str, hrefs=()) -> list:
+    """
+    Extrae emails candidatos del HTML y de los enlaces `mailto:`.
+    Decodifica las formas `%40` y `&#64;` antes de aplicar la regex.
+    Retorna lista en orden de aparición (puede contener duplicados).
+    """
+    candidatos = []
+    for href in hrefs:
+        if href.lower().startswith('mailto:'):
+            destino = unquote(href[7:]).split('?', 1)[0]
+            candidatos.extend(d.strip() for d in destino.split(',') if d.strip())
+
+    texto = html.replace('%40', '@').replace('&#64;', '@')
+    candidatos.extend(EMAIL_REGEX.findall(texto))
+    return candidatos
+
+
+def filtrar_candidatos(candidatos) -> list:
+    """
+    Filtro barato previo a la verificación por red:
+    - normaliza a minúsculas y elimina duplicados,
+    - descarta sufijos de ficheros (assets), hosts numéricos, TLDs inexistentes
+      y partes locales con pinta de hash.
+
+    Retorna la lista de candidatos que merece la pena verificar.
+    Actualiza PREFILTRO_STATS con cuántos descartó cada regla.
+    """
+    tlds = cargar_tlds()
+    vistos = set()
+    aceptados = []
+    descartes = Counter()
+
+    for candidato in candidatos:
+        email = candidato.strip().strip('.').lower()
+        if email in vistos:
+            _descartar('duplicado', descartes)
+            continue
+        vistos.add(email)
+
+        local, _, dominio = email.rpartition('@')
+        etiquetas = dominio.split('.')
+        tld = etiquetas[-1]
+
+        if not local or len(email) > 254 or '..' in email or '' in etiquetas:
+            _descartar('formato', descartes)
+        elif tld in EXTENSIONES_ASSET:
+            _descartar('asset', descartes)
+        elif all(e.isdigit() for e in etiquetas) or tld.isdigit():
+            _descartar('host_numerico', descartes)
+        elif tld not in tlds:
+            _descartar('tld_invalido', descartes)
+        elif HASH_REGEX.match(local):
+            _descartar('hash', descartes)
+        else:
+            aceptados.append(email)
+
+    with _stats_lock:
+        PREFILTRO_STATS.update(descartes)
+    return aceptados
@@ -1,7 +1,10 @@
-import dns.resolver
+import asyncio
 import pyisemail
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import smtplib
+
+from extractor.dns_cache import resolver_dns, resolver_dns_async
+from extractor.smtp_probe import SMTP_PROBER
 
 # Configuración de rutas (adaptar según necesidad)
 # CARPETA_BASE = Path("C:/Users/Usuario/Desktop/CSVExtractorProyect")
@@ -19,6 +22,13 @@ CARPETA_INPUTS.mkdir(parents=True, exist_ok=True)
 CARPETA_OUTPUTS.mkdir(parents=True, exist_ok=True)
 
 
+# Selectores DKIM habituales que se prueban en modo ultra-avanzado
+SELECTORES_DKIM = ['default', 'dkim', 'selector1', 'selector2', 'mail']
+
+# Hilos para lanzar en paralelo las comprobaciones de autenticación de un dominio
+_executor_autenticacion = ThreadPoolExecutor(max_workers=16)
+
+
 # Funciones de verificación
 def verificar_formato_email(email):
     """Verifica que el formato del email sea correcto utilizando pyisemail."""
@@ -28,73 +38,88 @@ def verificar_formato_email(email):
 def verificar_dominio(email):
     """Verifica que el dominio del email tenga registros DNS válidos."""
     dominio = email.split('@')[-1]
-    try:
-        dns.resolver.resolve(dominio, 'A')
-        return True
-    except dns.exception.DNSException:
-        return False
+    return len(resolver_dns(dominio, 'A')) > 0
 
 
 def verificar_MX(email):
     """Verifica que el dominio del email tenga registros MX válidos."""
     dominio = email.split('@')[-1]
-    try:
-        registros_mx = dns.resolver.resolve(dominio, 'MX')
-        return len(registros_mx) > 0
-    except dns.exception.DNSException:
-        return False
+    return len(resolver_dns(dominio, 'MX')) > 0
+
+
+def obtener_MX_principal(dominio):
+    """Devuelve el host MX de menor preferencia del dominio, o None si no tiene."""
+    registros_mx = []
+    for registro in resolver_dns(dominio, 'MX'):
+        preferencia, host = registro.split(None, 1)
+        registros_mx.append((int(preferencia), host))
+    if not registros_mx:
+        return None
+    return min(registros_mx)[1]
 
 
 def verificar_registros_SPF(dominio):
     """Verifica si el dominio tiene registros SPF válidos."""
-    try:
-        registros_spf = dns.resolver.resolve(dominio, 'TXT')
-        for txt_record in registros_spf:
-            if 'v=spf1' in str(txt_record).lower():
-                return True
-        return False
-    except dns.exception.DNSException:
-        return False
+    for txt_record in resolver_dns(dominio, 'TXT'):
+        if 'v=spf1' in txt_record.lower():
+            return True
+    return False
 
 
 def verificar_registros_DMARC(dominio):
     """Verifica si el dominio tiene una política DMARC."""
-    try:
-        registros_dmarc = dns.resolver.resolve('_dmarc.' + dominio, 'TXT')
-        for txt_record in registros_dmarc:
-            if 'v=dmarc1' in str(txt_record).lower():
-                return True
-        return False
-    except dns.exception.DNSException:
-        return False
+    for txt_record in resolver_dns('_dmarc.' + dominio, 'TXT'):
+        if 'v=dmarc1' in txt_record.lower():
+            return True
+    return False
+
+
+def _verificar_selector_DKIM(selector, dominio):
+    """Verifica si un selector DKIM concreto publica una clave (NXDOMAIN no corta el resto)."""
+    for txt_record in resolver_dns(f'{selector}._domainkey.{dominio}', 'TXT'):
+        if 'v=dkim1' in txt_record.lower():
+            return True
+    return False
 
 
 def verificar_registros_DKIM(dominio):
-    """Verifica si el dominio tiene registros DKIM."""
-    try:
-        selectores = ['default', 'dkim', 'selector1', 'selector2', 'mail']
-        for selector in selectores:
-            registros_dkim = dns.resolver.resolve(f'{selector}._domainkey.{dominio}', 'TXT')
-            for txt_record in registros_dkim:
-                if 'v=dkim1' in str(txt_record).lower():
-                    return True
-        return False
-    except dns.exception.DNSException:
-        return False
+    """Verifica si el dominio tiene registros DKIM (todos los selectores en paralelo)."""
+    futuros = [
+        _executor_autenticacion.submit(_verificar_selector_DKIM, selector, dominio)
+        for selector in SELECTORES_DKIM
+    ]
+    return any([f.result() for f in futuros])
 
 
 def verificar_servidor_SMTP(email):
-    """Verifica si el servidor SMTP del dominio está activo."""
+    """Verifica si el servidor SMTP del dominio está activo (una sonda por host MX y ejecución)."""
     dominio = email.split('@')[-1]
-    try:
-        registros_mx = dns.resolver.resolve(dominio, 'MX')
-        mx_record = str(min(registros_mx, key=lambda r: r.preference).exchange)
-        server = smtplib.SMTP(timeout=5)
-        server.connect(mx_record)
-        server.quit()
-        return True
-    except Exception:
+    mx_record = obtener_MX_principal(dominio)
+    if not mx_record:
         return False
+    return SMTP_PROBER.probar(mx_record)
+
+
+def verificar_autenticacion_dominio(dominio):
+    """
+    Lanza a la vez SPF, DMARC, cada selector DKIM y la sonda SMTP de un dominio.
+    La latencia es la de la consulta más lenta, no la suma de todas.
+
+    Retorna dict con claves 'SPF', 'DMARC', 'DKIM' y 'SMTP' (booleanos).
+    """
+    spf = _executor_autenticacion.submit(verificar_registros_SPF, dominio)
+    dmarc = _executor_autenticacion.submit(verificar_registros_DMARC, dominio)
+    dkim = [
+        _executor_autenticacion.submit(_verificar_selector_DKIM, selector, dominio)
+        for selector in SELECTORES_DKIM
+    ]
+    smtp = _executor_autenticacion.submit(verificar_servidor_SMTP, f"@{dominio}")
+    return {
+        'SPF': spf.result(),
+        'DMARC': dmarc.result(),
+        'DKIM': any([f.result() for f in dkim]),
+        'SMTP': smtp.result(),
+    }
 
 
 def verificar_disposable_email(email):
@@ -132,16 +157,82 @@ def verificar_existencia_email(email, modo='avanzado'):
         return resultados
 
     dominio = email.split('@')[-1]
+    autenticacion = verificar_autenticacion_dominio(dominio)
 
-    resultados['SPF'] = 'Válido' if verificar_registros_SPF(dominio) else 'Sin registros SPF'
-    resultados['DMARC'] = 'Válido' if verificar_registros_DMARC(dominio) else 'Sin registros DMARC'
-    resultados['DKIM'] = 'Válido' if verificar_registros_DKIM(dominio) else 'Sin registros DKIM'
+    resultados['SPF'] = 'Válido' if autenticacion['SPF'] else 'Sin registros SPF'
+    resultados['DMARC'] = 'Válido' if autenticacion['DMARC'] else 'Sin registros DMARC'
+    resultados['DKIM'] = 'Válido' if autenticacion['DKIM'] else 'Sin registros DKIM'
     resultados['Dominio desechable'] = 'Sí' if verificar_disposable_email(email) else 'No'
-    resultados['Servidor SMTP'] = 'Activo' if verificar_servidor_SMTP(email) else 'No responde'
+    resultados['Servidor SMTP'] = 'Activo' if autenticacion['SMTP'] else 'No responde'
 
     return resultados
 
 
+def _consultas_dominio(dominio, modo):
+    """Preguntas DNS distintas que necesita la verificación de un dominio según el modo."""
+    consultas = [(dominio, 'A')]
+    if modo != 'normal':
+        consultas.append((dominio, 'MX'))
+    if modo == 'ultra-avanzado':
+        consultas.append((dominio, 'TXT'))
+        consultas.append((f'_dmarc.{dominio}', 'TXT'))
+        consultas.extend((f'{selector}._domainkey.{dominio}', 'TXT') for selector in SELECTORES_DKIM)
+    return consultas
+
+
+async def _precargar_SMTP(dominio, tarea_mx):
+    """En cuanto se conoce el MX, lanza la sonda SMTP (memoizada) en un hilo."""
+    await tarea_mx
+    mx_record = obtener_MX_principal(dominio)
+    if mx_record:
+        await asyncio.to_thread(SMTP_PROBER.probar, mx_record)
+
+
+async def _precargar_dominio(dominio, modo, semaforo):
+    """Resuelve en paralelo las consultas DNS que necesitará el dominio (llenan la caché)."""
+    async with semaforo:
+        # Cada pregunta DNS distinta se lanza una sola vez
+        tareas = {
+            consulta: asyncio.ensure_future(resolver_dns_async(*consulta))
+            for consulta in _consultas_dominio(dominio, modo)
+        }
+        pendientes = list(tareas.values())
+        if modo == 'ultra-avanzado':
+            pendientes.append(_precargar_SMTP(dominio, tareas[(dominio, 'MX')]))
+        await asyncio.gather(*pendientes)
+
+
+async def verificar_lote_async(emails, modo='avanzado', max_concurrencia=50):
+    """
+    Versión asíncrona de `verificar_lote`, para llamar desde un bucle de eventos.
+    """
+    unicos = list(dict.fromkeys(emails))
+
+    # Agrupar por dominio solo los emails con formato válido (no necesitan red)
+    dominios = {e.split('@')[-1].lower() for e in unicos if verificar_formato_email(e)}
+
+    semaforo = asyncio.Semaphore(max_concurrencia)
+    await asyncio.gather(*(_precargar_dominio(d, modo, semaforo) for d in dominios))
+
+    # Con la caché caliente, la verificación por email no vuelve a salir a la red por A/MX
+    return {e: verificar_existencia_email(e, modo=modo) for e in unicos}
+
+
+def verificar_lote(emails, modo='avanzado', max_concurrencia=50):
+    """
+    Verifica un lote de emails agrupándolos por dominio.
+    - emails: iterable de direcciones (se ignoran duplicados).
+    - modo: 'normal', 'avanzado' o 'ultra-avanzado'.
+    - max_concurrencia: dominios resueltos a la vez.
+
+    Los dominios distintos se resuelven concurrentemente con un resolver asíncrono.
+    Retorna dict email -> resultados (mismo formato que `verificar_existencia_email`,
+    listo para `determinar_estado`).
+    No llamar desde un bucle de eventos en marcha: usar `verificar_lote_async`.
+    """
+    return asyncio.run(verificar_lote_async(emails, modo=modo, max_concurrencia=max_concurrencia))
+
+
 def determinar_estado(resultados, modo):
     """Determina el estado final del email basado en los resultados de verificación."""
     if 'Formato' in resultados and resultados['Formato'] != 'Válido':
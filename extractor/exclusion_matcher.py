@@ -0,0 +1,114 @@
+import json
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+EXCLUSIONES_FOLDER = BASE_DIR / "config" / "txt_config" / "xclusiones_email"
+RUTA_CACHE_EXCLUSIONES = BASE_DIR / "data" / "cache" / "exclusiones.json"
+
+
+def cargar_exclusiones(carpeta=EXCLUSIONES_FOLDER) -> set:
+    """Tokens de exclusión (en minúsculas) de todos los .txt de `carpeta`."""
+    exclusiones = set()
+    for fn in os.listdir(carpeta):
+        if fn.endswith(".txt"):
+            with open(os.path.join(carpeta, fn), encoding="utf-8") as f:
+                exclusiones.update(line.strip().lower() for line in f if line.strip())
+    return exclusiones
+
+
+def _firma(carpeta) -> list:
+    """Nombre, mtime y tamaño de cada lista: si cambia cualquiera, el patrón cacheado no vale."""
+    firma = []
+    for fn in sorted(os.listdir(carpeta)):
+        if fn.endswith(".txt"):
+            st = os.stat(os.path.join(carpeta, fn))
+            firma.append([fn, st.st_mtime_ns, st.st_size])
+    return firma
+
+
+def _patron_trie(tokens) -> str:
+    """
+    Expresión regular única con forma de trie (prefijos comunes compartidos), de modo que
+    cada posición del texto se compara contra el árbol y no contra cada token por separado.
+    Un token que es prefijo de otro basta para excluir, así que el más largo se poda.
+    """
+    trie = {}
+    for token in tokens:
+        nodo = trie
+        for car in token:
+            if '' in nodo:
+                break
+            nodo = nodo.setdefault(car, {})
+        else:
+            nodo.clear()
+            nodo[''] = True
+
+    def _regex(nodo):
+        if '' in nodo:
+            return ''
+        ramas, clase = [], []
+        for car in sorted(nodo):
+            sub = _regex(nodo[car])
+            if sub:
+                ramas.append(re.escape(car) + sub)
+            else:
+                clase.append(re.escape(car))
+        if clase:
+            ramas.append(clase[0] if len(clase) == 1 else f"[{''.join(clase)}]")
+        return ramas[0] if len(ramas) == 1 else f"(?:{'|'.join(ramas)})"
+
+    return _regex(trie) if trie else ''
+
+
+class ExclusionMatcher:
+    """
+    Comprobador de exclusiones compilado una vez por ejecución: un email queda excluido
+    si contiene (en minúsculas) cualquiera de los tokens de las listas.
+    - `desde_carpeta` reutiliza el patrón cacheado en disco mientras no cambien las listas.
+    - `mascara` lo aplica vectorizado a una Serie de emails.
+    """
+
+    def __init__(self, patron: str, n_tokens: int):
+        self.patron = patron
+        self.n_tokens = n_tokens
+        # Sin tokens no se excluye nada: patrón que nunca coincide
+        self.regex = re.compile(patron or r"(?!)")
+
+    @classmethod
+    def desde_tokens(cls, tokens) -> "ExclusionMatcher":
+        tokens = {t.lower() for t in tokens if t}
+        return cls(_patron_trie(tokens), len(tokens))
+
+    @classmethod
+    def desde_carpeta(cls, carpeta=EXCLUSIONES_FOLDER, ruta_cache: Path = RUTA_CACHE_EXCLUSIONES) -> "ExclusionMatcher":
+        firma = _firma(carpeta)
+        ruta_cache = Path(ruta_cache)
+        try:
+            with open(ruta_cache, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get("firma") == firma:
+                return cls(cache["patron"], cache["tokens"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        matcher = cls.desde_tokens(cargar_exclusiones(carpeta))
+        ruta_cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta_cache.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"firma": firma, "patron": matcher.patron, "tokens": matcher.n_tokens}, f, ensure_ascii=False)
+        os.replace(tmp, ruta_cache)
+        return matcher
+
+    def __len__(self):
+        return self.n_tokens
+
+    def excluido(self, email: str) -> bool:
+        return self.regex.search(email.lower()) is not None
+
+    def mascara(self, emails: pd.Series) -> pd.Series:
+        """True en los emails que contienen algún token de exclusión."""
+        return emails.str.lower().str.contains(self.regex, na=False)
@@ -1,111 +1,176 @@
-import pandas as pd
+import math
+from collections import Counter
 from pathlib import Path
 from urllib.parse import urlparse
 
+import pandas as pd
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
 # Ruta base: suponiendo que este archivo está en extractor/
 BASE_DIR = Path(__file__).resolve().parent.parent
 OUTPUT_FOLDER = BASE_DIR / "data" / "outputs"
 
-def generar_excel(df_resultado, nombre_archivo):
+# Filas de datos por hoja: el límite de Excel (1.048.576) menos la cabecera
+MAX_FILAS_HOJA = 1048575
+
+SOCIAL_COLS = ["facebook", "instagram", "linkedin", "x"]
+
+AVISO_LEGAL = """Legal Notice
+© companiesdata.cloud All rights reserved.
+Registered with the Ministry of Culture and Historical Heritage GR-00416-2020.
+https://companiesdata.cloud/ and https://www.centraldecomunicacion.es/
+
+The data sources are the official websites of each company.
+We do not handle personal data, therefore LOPD and GDPR do not apply.
+
+The database is non-transferable and non-replicable.
+Copying, distribution, or publication, in whole or in part, without express consent is prohibited.
+Legal action will be taken for copyright infringements.
+
+For more information, please refer to our FAQ:
+https://companiesdata.cloud/faq and https://www.centraldecomunicacion.es/preguntas-frecuentes-bases-de-datos/
+
+Reproduction, distribution, public communication, and transformation, in whole or in part,
+of the contents of this database are prohibited without the express authorization of companiesdata.cloud and centraldecomunicacion.es
+The data has been collected from public sources and complies with current regulations."""
+
+
+class _Estadisticas:
+    """Métricas de la hoja `statistics` y `sectors`, acumuladas bloque a bloque."""
+
+    def __init__(self):
+        self.empresas = 0
+        self.dominios = set()
+        self.emails = 0
+        self.telefonos = 0
+        self.redes = 0
+        self.sectores = Counter()
+        self.hay_sectores = False
+
+    def actualizar(self, df: pd.DataFrame):
+        self.empresas += len(df)
+        if "website" in df.columns:
+            self.dominios.update(
+                df["website"].dropna().astype(str).map(lambda s: urlparse(s).netloc)
+            )
+        if "email" in df.columns:
+            self.emails += int(df["email"].astype(bool).sum())
+        if "phone" in df.columns:
+            self.telefonos += int(df["phone"].astype(bool).sum())
+        for col in SOCIAL_COLS:
+            if col in df.columns:
+                self.redes += sum(
+                    sum(1 for link in s.split(",") if link.strip())
+                    for s in df[col].dropna().astype(str)
+                )
+        if "main_category" in df.columns:
+            self.hay_sectores = True
+            self.sectores.update(df["main_category"].dropna())
+
+
+def _valor_celda(valor):
+    """NaN/NaT a celda vacía (como `to_excel`); el resto, tal cual."""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)) or valor is pd.NaT:
+        return None
+    return valor
+
+
+def _escribir_tabla(worksheet, cabecera, filas, formato_cabecera):
+    worksheet.write_row(0, 0, cabecera, formato_cabecera)
+    for r, fila in enumerate(filas, start=1):
+        worksheet.write_row(r, 0, fila)
+
+
+def generar_excel_por_bloques(bloques, nombre_archivo, max_filas_hoja: int = MAX_FILAS_HOJA):
     """
-    Genera un archivo Excel con:
-      - Hoja `data` con los datos y autofiltros.
+    Genera el Excel de resultados escribiendo fila a fila (modo de memoria constante de xlsxwriter):
+      - Hoja `data` con los datos y autofiltros; si se supera el límite de filas de Excel,
+        continúa en `data_2`, `data_3`...
       - Hoja `statistics` con métricas.
       - Hoja `sectors` (si existe `main_category`).
       - Hoja `copyright` con aviso legal.
-    """
-    # --- Cálculo de métricas adicionales ---
-    if "website" in df_resultado.columns:
-        domains = (
-            df_resultado["website"]
-            .dropna()
-            .astype(str)
-            .apply(lambda s: urlparse(s).netloc)
-        )
-        num_domains = domains.nunique()
-    else:
-        num_domains = 0
-
-    social_cols = ["facebook", "instagram", "linkedin", "x"]
-    num_socials = 0
-    for col in social_cols:
-        if col in df_resultado.columns:
-            counts = (
-                df_resultado[col]
-                .dropna()
-                .astype(str)
-                .apply(lambda s: sum(1 for link in s.split(",") if link.strip()))
-                .sum()
-            )
-            num_socials += counts
 
-    # --- Escritura del Excel ---
+    `bloques` es un iterable de DataFrames con las mismas columnas; las métricas se acumulan
+    al recorrerlos, sin una segunda copia de los datos.
+    """
     excel_path = OUTPUT_FOLDER / f"{nombre_archivo.replace('.csv', '')}.xlsx"
-    # Deshabilitar conversión automática de cadenas a URLs
-    with pd.ExcelWriter(
-            excel_path,
-            engine="xlsxwriter",
-            engine_kwargs={"options": {"strings_to_urls": False}}
-    ) as writer:
-
-        # Hoja de datos
-        df_resultado.to_excel(writer, sheet_name="data", index=False)
-        worksheet = writer.sheets["data"]
-        last_col = len(df_resultado.columns)
-        if last_col > 0:
-            last_letter = chr(ord('A') + last_col - 1)
-            worksheet.autofilter(f"A1:{last_letter}1")
-
-        # Hoja de estadísticas
-        stats = {
-            "Number of companies":       [len(df_resultado)],
-            "Number of domains":         [num_domains],
-            "Number of emails (valid)":  [df_resultado.get("email", pd.Series()).astype(bool).sum()],
-            "Number of phone numbers":   [df_resultado.get("phone", pd.Series()).astype(bool).sum()],
-            "Number of social networks": [num_socials],
-        }
-        df_stats = pd.DataFrame(stats)
-        df_stats.to_excel(writer, sheet_name="statistics", index=False)
-
-        # Sectores (main_category)
-        if "main_category" in df_resultado.columns:
-            df_sectors = (
-                df_resultado["main_category"]
-                .value_counts()
-                .reset_index()
-                .rename(columns={"index": "Sector", "main_category": "Number of companies"})
-            )
-            df_sectors.to_excel(writer, sheet_name="sectors", index=False)
-
-        # Copyright
-        copyright_text = (
-            "Legal Notice
-            © companiesdata.cloud All rights reserved.
-            Registered with the Ministry of Culture and Historical Heritage GR-00416-2020.
-            https://companiesdata.cloud/ and https://www.centraldecomunicacion.es/
-        
-            The data sources are the official websites of each company.
-            We do not handle personal data, therefore LOPD and GDPR do not apply.
-        
-            The database is non-transferable and non-replicable.
-            Copying, distribution, or publication, in whole or in part, without express consent is prohibited.
-            Legal action will be taken for copyright infringements.
-        
-            For more information, please refer to our FAQ:
-            https://companiesdata.cloud/faq and https://www.centraldecomunicacion.es/preguntas-frecuentes-bases-de-datos/
-        
-            Reproduction, distribution, public communication, and transformation, in whole or in part,
-            of the contents of this database are prohibited without the express authorization of companiesdata.cloud and centraldecomunicacion.es
-            The data has been collected from public sources and complies with current regulations."
-        )
-        df_copyright = pd.DataFrame(
-            [[line] for line in copyright_text.split("\n")]
-        )
-        df_copyright.to_excel(
-            writer,
-            sheet_name="copyright",
-            index=False,
-            header=False
+    # constant_memory: cada fila se vuelca a disco al pasar a la siguiente
+    # strings_to_urls: deshabilitar conversión automática de cadenas a URLs
+    # default_date_format: fechas con formato de fecha, como hacía `to_excel`
+    workbook = xlsxwriter.Workbook(
+        str(excel_path),
+        {"constant_memory": True, "strings_to_urls": False, "default_date_format": "yyyy-mm-dd hh:mm:ss"},
+    )
+    formato_cabecera = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    stats = _Estadisticas()
+
+    hojas = []          # Hojas de datos creadas
+    columnas = None
+    worksheet, fila = None, 0
+
+    def _cerrar_hoja():
+        if worksheet is not None and columnas:
+            worksheet.autofilter(f"A1:{xl_col_to_name(len(columnas) - 1)}{fila + 1}")
+
+    for df in bloques:
+        if columnas is None:
+            columnas = list(df.columns)
+        stats.actualizar(df)
+        valores = df.astype(object).itertuples(index=False, name=None)
+        for registro in valores:
+            if worksheet is None or fila >= max_filas_hoja:
+                _cerrar_hoja()
+                nombre_hoja = "data" if worksheet is None else f"data_{len(hojas) + 1}"
+                worksheet = workbook.add_worksheet(nombre_hoja)
+                worksheet.write_row(0, 0, columnas, formato_cabecera)
+                hojas.append(worksheet)
+                fila = 0
+            fila += 1
+            worksheet.write_row(fila, 0, [_valor_celda(v) for v in registro])
+
+    if worksheet is None:
+        # Sin filas: hoja de datos solo con la cabecera
+        worksheet = workbook.add_worksheet("data")
+        hojas.append(worksheet)
+        if columnas:
+            worksheet.write_row(0, 0, columnas, formato_cabecera)
+    _cerrar_hoja()
+
+    # Hoja de estadísticas
+    _escribir_tabla(
+        workbook.add_worksheet("statistics"),
+        ["Number of companies", "Number of domains", "Number of emails (valid)",
+         "Number of phone numbers", "Number of social networks"],
+        [[stats.empresas, len(stats.dominios), stats.emails, stats.telefonos, stats.redes]],
+        formato_cabecera,
+    )
+
+    # Sectores (main_category)
+    if stats.hay_sectores:
+        _escribir_tabla(
+            workbook.add_worksheet("sectors"),
+            ["Sector", "Number of companies"],
+            [[sector, n] for sector, n in stats.sectores.most_common()],
+            formato_cabecera,
         )
 
-    print(f"📊 Excel generado con estadísticas y datos: {excel_path}")
+    # Copyright
+    copyright_ws = workbook.add_worksheet("copyright")
+    for r, linea in enumerate(AVISO_LEGAL.split("\n")):
+        copyright_ws.write_string(r, 0, linea)
+
+    workbook.close()
+    extra = f" en {len(hojas)} hojas de datos" if len(hojas) > 1 else ""
+    print(f"📊 Excel generado con estadísticas y datos{extra}: {excel_path}")
+
+
+def generar_excel(df_resultado, nombre_archivo):
+    """
+    Genera un archivo Excel con:
+      - Hoja `data` con los datos y autofiltros.
+      - Hoja `statistics` con métricas.
+      - Hoja `sectors` (si existe `main_category`).
+      - Hoja `copyright` con aviso legal.
+    """
+    generar_excel_por_bloques([df_resultado], nombre_archivo)
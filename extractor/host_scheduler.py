@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from extractor.dns_cache import resolver_dns
+from extractor.utils import normalizar_host
+
+# Parámetros de cortesía por defecto
+MAX_POR_HOST     = 2      # Peticiones simultáneas contra un mismo host
+MAX_POR_IP       = 4      # Peticiones simultáneas contra una misma IP (hosting compartido)
+BACKOFF_INICIAL  = 5      # Segundos de pausa tras el primer 429/5xx
+BACKOFF_MAXIMO   = 120    # Techo de la pausa exponencial
+ESTADOS_BACKOFF  = {429, 500, 502, 503, 504}
+
+
+def intercalar(items, clave):
+    """
+    Reordena `items` en turnos (round-robin) por `clave(item)`, de modo que elementos
+    consecutivos apunten a hosts distintos. Conserva el orden relativo dentro de cada clave.
+    """
+    colas = OrderedDict()
+    for item in items:
+        colas.setdefault(clave(item), []).append(item)
+    resultado = []
+    ronda = 0
+    while colas:
+        for k in list(colas):
+            cola = colas[k]
+            resultado.append(cola[ronda])
+            if ronda + 1 >= len(cola):
+                del colas[k]
+        ronda += 1
+    return resultado
+
+
+def _segundos_retry_after(valor) -> float:
+    """Interpreta la cabecera Retry-After (segundos o fecha HTTP); None si no es válida."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostScheduler:
+    """
+    Planificador de cortesía por host para los trabajadores de scraping.
+    - `turno(url)` limita las peticiones simultáneas por host y por IP resuelta
+      y espera si el host está en pausa.
+    - `registrar_respuesta(url, estado)` aplica una pausa exponencial al host tras 429/5xx
+      (respetando Retry-After) y la levanta con la primera respuesta correcta.
+    """
+
+    def __init__(
+        self,
+        max_por_host: int = MAX_POR_HOST,
+        max_por_ip: int = MAX_POR_IP,
+        backoff_inicial: float = BACKOFF_INICIAL,
+        backoff_maximo: float = BACKOFF_MAXIMO,
+    ):
+        self.max_por_host = max_por_host
+        self.max_por_ip = max_por_ip
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self._cond = threading.Condition()
+        self._activos_host = defaultdict(int)
+        self._activos_ip = defaultdict(int)
+        self._ips = {}
+        self._pausas = {}     # host -> (instante hasta el que esperar, pausa actual)
+        self.stats = {'esperas_cupo': 0, 'pausas': 0, 'segundos_pausa': 0.0}
+
+    def _ip(self, host: str) -> str:
+        """IP del host (vía la caché DNS compartida); el propio host si no resuelve."""
+        with self._cond:
+            if host in self._ips:
+                return self._ips[host]
+        try:
+            registros = resolver_dns(host, 'A')
+        except Exception:
+            registros = []
+        ip = registros[0] if registros else host
+        with self._cond:
+            self._ips[host] = ip
+        return ip
+
+    def espera_pendiente(self, url: str) -> float:
+        """Segundos que quedan de pausa para el host de la URL (0 si ninguna)."""
+        host = normalizar_host(url)
+        with self._cond:
+            hasta, _ = self._pausas.get(host, (0, 0))
+        return max(0.0, hasta - time.time())
+
+    def esperar_pausa(self, url: str):
+        """Bloquea mientras el host esté en pausa por backoff."""
+        espera = self.espera_pendiente(url)
+        if espera > 0:
+            with self._cond:
+                self.stats['segundos_pausa'] += espera
+            time.sleep(espera)
+
+    @contextmanager
+    def turno(self, url: str):
+        """Reserva un hueco para el host y la IP de la URL durante el bloque `with`."""
+        host = normalizar_host(url)
+        ip = self._ip(host) if host else ''
+        self.esperar_pausa(url)
+        with self._cond:
+            if self._activos_host[host] >= self.max_por_host or self._activos_ip[ip] >= self.max_por_ip:
+                self.stats['esperas_cupo'] += 1
+            while self._activos_host[host] >= self.max_por_host or self._activos_ip[ip] >= self.max_por_ip:
+                self._cond.wait()
+            self._activos_host[host] += 1
+            self._activos_ip[ip] += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._activos_host[host] -= 1
+                self._activos_ip[ip] -= 1
+                if not self._activos_host[host]:
+                    del self._activos_host[host]
+                if not self._activos_ip[ip]:
+                    del self._activos_ip[ip]
+                self._cond.notify_all()
+
+    def registrar_respuesta(self, url: str, estado: int, retry_after=None):
+        """Actualiza la pausa del host según el código HTTP recibido."""
+        host = normalizar_host(url)
+        if not host:
+            return
+        with self._cond:
+            if estado in ESTADOS_BACKOFF:
+                _, pausa = self._pausas.get(host, (0, 0))
+                pausa = min(self.backoff_maximo, pausa * 2 if pausa else self.backoff_inicial)
+                indicada = _segundos_retry_after(retry_after)
+                if indicada is not None:
+                    pausa = min(self.backoff_maximo, max(pausa, indicada))
+                self._pausas[host] = (time.time() + pausa, pausa)
+                self.stats['pausas'] += 1
+            elif estado < 400:
+                self._pausas.pop(host, None)
+
+    def estadisticas(self) -> dict:
+        with self._cond:
+            return dict(self.stats)
+
+
+# Planificador global compartido por todos los trabajadores
+HOST_SCHEDULER = HostScheduler()
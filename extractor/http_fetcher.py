@@ -0,0 +1,266 @@
+import codecs
+import re
+import threading
+import time
+from collections import Counter
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from extractor.page_fetcher import PageSnapshot, fetch_page
+from extractor.host_scheduler import HOST_SCHEDULER
+from extractor.adaptive_timeouts import TIMEOUTS
+
+# Parámetros de la capa HTTP
+USER_AGENT       = "Mozilla/5.0"
+MAX_BYTES_HTML   = 3 * 1024 * 1024    # Leer como máximo 3 MB por página
+POOL_CONEXIONES  = 20
+MIN_TEXTO_VISIBLE = 40                # Menos caracteres visibles => probablemente renderizado por JS
+
+# Errores HTTP en los que un navegador real sí puede obtener la página (anti-bot, límites, caídas
+# transitorias); el resto (404, 410, 500...) se tratan como página vacía, sin abrir el navegador
+ESTADOS_NAVEGADOR = (403, 429, 503)
+
+_RE_CHARSET_CABECERA = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_RE_CHARSET_META = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+# Marcadores típicos de aplicaciones SPA que montan el contenido con JavaScript
+SPA_MARKERS = (
+    '<div id="root"></div>',
+    '<div id="app"></div>',
+    '<div id="__nuxt"></div>',
+    '<app-root></app-root>',
+    'ng-app=',
+    'you need to enable javascript',
+    'please enable javascript',
+    'enable javascript to run this app',
+)
+
+# Contadores por ejecución de qué camino tomó cada sitio
+_stats_lock = threading.Lock()
+FETCH_STATS = Counter()
+
+# Una sesión (con pool de conexiones) por hilo: requests.Session no es thread-safe
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONEXIONES, pool_maxsize=POOL_CONEXIONES, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+        })
+        _thread_local.session = session
+    return session
+
+
+def contar_camino(camino: str):
+    """Suma uno al contador del camino de carga ('http', 'selenium', 'error')."""
+    with _stats_lock:
+        FETCH_STATS[camino] += 1
+
+
+def reiniciar_estadisticas():
+    """Pone a cero los contadores de caminos de carga."""
+    with _stats_lock:
+        FETCH_STATS.clear()
+
+
+def resumen_fetch() -> dict:
+    """Devuelve una copia de los contadores: 'http', 'selenium', 'error'."""
+    with _stats_lock:
+        return dict(FETCH_STATS)
+
+
+def _codificacion_valida(nombre):
+    if not nombre:
+        return None
+    try:
+        return codecs.lookup(nombre).name
+    except LookupError:
+        return None
+
+
+def decodificar_html(contenido: bytes, content_type: str = "") -> str:
+    """
+    Decodifica el HTML igual en los dos motores (requests y aiohttp):
+    charset de la cabecera Content-Type, si no el de <meta charset> / http-equiv,
+    si no UTF-8 y, si el contenido no es UTF-8 válido, windows-1252.
+    """
+    encontrado = _RE_CHARSET_CABECERA.search(content_type or "")
+    codificacion = _codificacion_valida(encontrado.group(1) if encontrado else None)
+    if codificacion is None:
+        encontrado = _RE_CHARSET_META.search(contenido[:4096])
+        codificacion = _codificacion_valida(encontrado.group(1).decode("ascii") if encontrado else None)
+    if codificacion is not None:
+        return contenido.decode(codificacion, errors="replace")
+    try:
+        return contenido.decode("utf-8")
+    except UnicodeDecodeError:
+        return contenido.decode("cp1252", errors="replace")
+
+
+def snapshot_vacio(url: str, final_url: str, status: int) -> PageSnapshot:
+    """Resultado de un error HTTP definitivo (404, 410...): página sin contenido, sin navegador."""
+    return PageSnapshot(url=url, final_url=final_url, html="", hrefs=[], origen="http", status=status, texto_visible=0)
+
+
+def es_error_definitivo(snapshot: PageSnapshot) -> bool:
+    """True si el snapshot es un error HTTP en el que el navegador no ayudaría."""
+    return snapshot.status is not None and snapshot.status >= 400
+
+
+class _AnchorParser(HTMLParser):
+    """Recoge los href de <a> y el texto visible del <body> de un HTML estático."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+        self.texto = 0
+        self._ignorar = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for nombre, valor in attrs:
+                if nombre == "href" and valor:
+                    self.hrefs.append(valor.strip())
+        elif tag in ("script", "style", "noscript", "template"):
+            self._ignorar += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript", "template") and self._ignorar:
+            self._ignorar -= 1
+
+    def handle_data(self, data):
+        if not self._ignorar:
+            self.texto += len(data.strip())
+
+
+def snapshot_from_html(url: str, final_url: str, html: str, status: int = None) -> PageSnapshot:
+    """
+    Construye un PageSnapshot a partir de HTML estático.
+    Los href relativos se resuelven contra `final_url`, como hace el navegador.
+    """
+    parser = _AnchorParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+
+    hrefs = []
+    for href in parser.hrefs:
+        if href.lower().startswith(("javascript:", "#")):
+            continue
+        hrefs.append(urljoin(final_url, href))
+
+    return PageSnapshot(
+        url=url,
+        final_url=final_url,
+        html=html,
+        hrefs=hrefs,
+        origen="http",
+        status=status,
+        texto_visible=parser.texto,
+    )
+
+
+def necesita_navegador(snapshot: PageSnapshot) -> bool:
+    """
+    Indica si el HTML estático parece renderizado por JavaScript:
+    cuerpo vacío, sin enlaces o con un marcador SPA conocido.
+    """
+    if not snapshot.html.strip():
+        return True
+    if not snapshot.hrefs:
+        return True
+    if snapshot.texto_visible is not None and snapshot.texto_visible < MIN_TEXTO_VISIBLE:
+        return True
+    html_lower = snapshot.html.lower()
+    return any(marker in html_lower for marker in SPA_MARKERS)
+
+
+def fetch_page_http(url: str, timeout=None) -> PageSnapshot:
+    """
+    Descarga la URL con el cliente HTTP compartido y devuelve un PageSnapshot.
+    - timeout: (conexión, lectura); por defecto, los timeouts adaptativos de la ejecución.
+    Devuelve None si la respuesta no es HTML o es un error HTTP que el navegador podría
+    superar (ESTADOS_NAVEGADOR); el resto de errores HTTP dan un snapshot vacío.
+    Lanza requests.RequestException si no se pudo conectar.
+    """
+    if timeout is None:
+        timeout = (TIMEOUTS.timeout('conexion'), TIMEOUTS.timeout('http'))
+    session = _get_session()
+    inicio = time.monotonic()
+    with session.get(url, timeout=timeout, stream=True, allow_redirects=True) as resp:
+        TIMEOUTS.registrar('conexion', resp.elapsed.total_seconds())
+        HOST_SCHEDULER.registrar_respuesta(url, resp.status_code, resp.headers.get("Retry-After"))
+        content_type = resp.headers.get("Content-Type", "").lower()
+        if resp.status_code >= 400:
+            if resp.status_code in ESTADOS_NAVEGADOR:
+                return None
+            return snapshot_vacio(url, resp.url, resp.status_code)
+        if content_type and "html" not in content_type:
+            return None
+
+        contenido = bytearray()
+        for bloque in resp.iter_content(chunk_size=64 * 1024):
+            contenido.extend(bloque)
+            if len(contenido) >= MAX_BYTES_HTML:
+                break
+        html = decodificar_html(bytes(contenido), resp.headers.get("Content-Type", ""))
+        TIMEOUTS.registrar('http', time.monotonic() - inicio)
+        return snapshot_from_html(url, resp.url, html, status=resp.status_code)
+
+
+def fetch_page_auto(url: str, driver=None, get_driver=None, wait_timeout: int = 10, fallback=None) -> PageSnapshot:
+    """
+    Carga la URL primero por HTTP y solo recurre a Selenium si hace falta.
+    - driver: instancia Selenium para el respaldo.
+    - get_driver: alternativa perezosa; función que devuelve un driver solo cuando se necesita.
+    - fallback: alternativa a las anteriores; función url -> PageSnapshot con navegador
+      (p.ej. a través de un BrowserPool).
+    - wait_timeout: segundos a esperar por el <body> en el respaldo Selenium.
+
+    Los fallos de conexión (DNS, rechazo, timeout) se propagan sin abrir el navegador, y los
+    errores HTTP definitivos (404, 410...) devuelven un snapshot vacío.
+    """
+    try:
+        snapshot = fetch_page_http(url)
+        if snapshot is not None and (es_error_definitivo(snapshot) or not necesita_navegador(snapshot)):
+            contar_camino("http")
+            return snapshot
+    except requests.exceptions.SSLError:
+        # Certificados problemáticos: el navegador decide
+        pass
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        if isinstance(e, requests.exceptions.ConnectTimeout):
+            TIMEOUTS.registrar_agotado('conexion')
+        elif isinstance(e, requests.exceptions.ReadTimeout):
+            TIMEOUTS.registrar_agotado('http')
+        contar_camino("error")
+        raise
+    except requests.RequestException:
+        pass
+
+    # Si el host pidió calma (429/5xx), respetar la pausa antes de insistir con el navegador
+    HOST_SCHEDULER.esperar_pausa(url)
+    try:
+        if fallback is not None:
+            snapshot = fallback(url)
+        else:
+            if driver is None and get_driver is not None:
+                driver = get_driver()
+            snapshot = fetch_page(url, driver=driver, wait_timeout=wait_timeout)
+    except Exception:
+        contar_camino("error")
+        raise
+    contar_camino("selenium")
+    return snapshot
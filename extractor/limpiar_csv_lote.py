@@ -3,49 +3,128 @@ import glob
 import os
 import sys
 import codecs
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-# Configura la salida estándar para que acepte caracteres UTF-8
-sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach(), "replace")
+# Permite ejecutarlo también como script: hace visible el paquete extractor
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from extractor.column_plan import PlanColumnas, leer_cabecera, renombrar_cabecera
+
+# Motor de lectura rápido si está disponible (pyarrow es opcional)
+try:
+    import pyarrow  # noqa: F401
+    MOTOR_CSV = "pyarrow"
+except ImportError:
+    MOTOR_CSV = "c"
 
 # 📂 Definir la carpeta base y de salida usando rutas relativas al proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
 carpeta_base = BASE_DIR / "data" / "inputs"
 carpeta_salida = BASE_DIR / "data" / "clean_inputs"
-os.makedirs(carpeta_salida, exist_ok=True)
-
-# 📌 Columnas a eliminar
-columnas_a_eliminar = [
-    "is_spending_on_ads",
-    "can_claim",
-    "owner_name",
-    "owner_profile_link",
-    "is_temporarily_closed",
-    "query"
-]
-
-# 🔍 Buscar todos los archivos .csv en la carpeta inputs
-archivos_encontrados = glob.glob(str(carpeta_base / "*.csv"))
-
-# Verificar si hay archivos en la carpeta
-if not archivos_encontrados:
-    print(f"❌ No se encontraron archivos CSV en la carpeta: {carpeta_base}")
-else:
-    for archivo in archivos_encontrados:
-        try:
-            df = pd.read_csv(archivo, encoding="utf-8", sep=",")
-
-            print(f"Columnas en {os.path.basename(archivo)}: {df.columns.tolist()}")
-            columnas_encontradas = [col for col in columnas_a_eliminar if col in df.columns]
-            print(f"Columnas a eliminar: {columnas_encontradas}")
-
-            if columnas_encontradas:
-                df.drop(columns=columnas_encontradas, inplace=True)
-
-            archivo_salida = carpeta_salida / os.path.basename(archivo)
-            df.to_csv(archivo_salida, index=False, encoding="utf-8")
-
-            print(f"✅ Archivo limpio guardado: {archivo_salida}")
-
-        except Exception as e:
-            print(f"❌ Error al procesar {os.path.basename(archivo)}: {e}")
+
+# 📌 Plan de columnas (eliminar / renombrar / orden) desde config/txt_config
+PLAN = PlanColumnas.desde_config()
+
+# Filas sin web http/https no aportan nada al scraping
+DESCARTAR_SIN_WEB = True
+MAX_PROCESOS = min(4, os.cpu_count() or 1)
+
+
+def limpiar_csv(archivo, carpeta_destino=carpeta_salida, plan: PlanColumnas = None) -> str:
+    """
+    Limpia un CSV de entrada y lo guarda en `carpeta_destino` con el mismo nombre,
+    aplicando el plan de columnas en esta primera (y única) lectura:
+    - Lee solo las columnas que se conservan (usecols), con el motor más rápido disponible.
+    - Aplica los renombrados del plan.
+    - Descarta las filas sin una web utilizable (si DESCARTAR_SIN_WEB).
+    Si el plan solo renombra y no hay filas que descartar (se comprueba leyendo solo la
+    columna website), reescribe únicamente la cabecera y copia el resto tal cual.
+
+    Retorna la ruta del fichero limpio.
+    """
+    plan = plan or PLAN
+    archivo = Path(archivo)
+    cabecera = leer_cabecera(archivo)
+    print(f"Columnas en {archivo.name}: {cabecera}")
+    columnas = plan.proyeccion(cabecera)
+    print(f"Columnas a eliminar: {[col for col in cabecera if col not in columnas]}")
+    renombres = plan.renombres(columnas)
+
+    os.makedirs(carpeta_destino, exist_ok=True)
+    archivo_salida = Path(carpeta_destino) / archivo.name
+
+    filtrar_filas = DESCARTAR_SIN_WEB and "website" in columnas
+    if plan.solo_renombra(cabecera) and (not filtrar_filas or _todas_con_web(archivo)):
+        renombrar_cabecera(archivo, archivo_salida, renombres)
+        print(f"✅ Archivo limpio guardado (solo cabecera): {archivo_salida}")
+        return str(archivo_salida)
+
+    df = pd.read_csv(archivo, encoding="utf-8", sep=",", usecols=columnas, engine=MOTOR_CSV)
+    df = df[columnas]   # usecols no garantiza el orden original con todos los motores
+
+    if filtrar_filas:
+        utilizable = _web_utilizable(df["website"])
+        descartadas = int((~utilizable).sum())
+        if descartadas:
+            df = df[utilizable]
+            print(f"Filas sin web descartadas: {descartadas}")
+
+    if renombres:
+        df.rename(columns=renombres, inplace=True)
+    df.to_csv(archivo_salida, index=False, encoding="utf-8")
+    print(f"✅ Archivo limpio guardado: {archivo_salida}")
+    return str(archivo_salida)
+
+
+def _web_utilizable(web: pd.Series) -> pd.Series:
+    """True en las filas con una web http/https."""
+    web = web.astype("string").str.strip().str.lower()
+    return web.str.startswith(("http://", "https://")).fillna(False).astype(bool)
+
+
+def _todas_con_web(archivo) -> bool:
+    """Comprueba, leyendo solo la columna website, que ninguna fila se descartaría."""
+    web = pd.read_csv(archivo, encoding="utf-8", usecols=["website"], engine=MOTOR_CSV)["website"]
+    return bool(_web_utilizable(web).all())
+
+
+def limpiar_lote(archivos, carpeta_destino=carpeta_salida, max_procesos: int = MAX_PROCESOS):
+    """
+    Limpia varios CSV en paralelo con un pool de procesos.
+    Genera (archivo de entrada, ruta limpia) a medida que cada uno termina;
+    la ruta limpia es None si ese fichero falló.
+    """
+    archivos = list(archivos)
+    if not archivos:
+        return
+    if max_procesos <= 1 or len(archivos) == 1:
+        for archivo in archivos:
+            yield archivo, _limpiar_seguro(archivo, carpeta_destino)
+        return
+    with ProcessPoolExecutor(max_workers=min(max_procesos, len(archivos))) as pool:
+        futuros = {pool.submit(_limpiar_seguro, archivo, carpeta_destino): archivo for archivo in archivos}
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
+
+
+def _limpiar_seguro(archivo, carpeta_destino):
+    try:
+        return limpiar_csv(archivo, carpeta_destino)
+    except Exception as e:
+        print(f"❌ Error al procesar {os.path.basename(archivo)}: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    # Configura la salida estándar para que acepte caracteres UTF-8
+    sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach(), "replace")
+
+    # 🔍 Buscar todos los archivos .csv en la carpeta inputs
+    archivos_encontrados = glob.glob(str(carpeta_base / "*.csv"))
+
+    # Verificar si hay archivos en la carpeta
+    if not archivos_encontrados:
+        print(f"❌ No se encontraron archivos CSV en la carpeta: {carpeta_base}")
+    else:
+        for _ in limpiar_lote(archivos_encontrados):
+            pass
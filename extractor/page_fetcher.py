@@ -0,0 +1,97 @@
+import time
+from dataclasses import dataclass, field
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+
+from extractor.utils import setup_driver
+
+
+@dataclass
+class PageSnapshot:
+    """
+    Captura de una página ya cargada, compartida por los extractores.
+    - url: dirección solicitada.
+    - final_url: dirección tras redirecciones.
+    - html: código fuente de la página (vacío si se extrajo dentro del navegador).
+    - hrefs: destinos de los enlaces <a> (absolutos).
+    - origen: 'selenium' o 'http', según qué capa la obtuvo.
+    - status: código HTTP si se conoce (None con Selenium).
+    - texto_visible: caracteres de texto visible (solo capa HTTP).
+    - emails_dom: emails candidatos encontrados en el DOM por SCRIPT_EXTRACCION (solo Selenium).
+    """
+    url: str
+    final_url: str
+    html: str = ""
+    hrefs: list = field(default_factory=list)
+    origen: str = "selenium"
+    status: int = None
+    texto_visible: int = None
+    emails_dom: list = None
+
+
+# Script que corre dentro del navegador y devuelve en un solo JSON todo lo que
+# necesitan los extractores: evita un round-trip WebDriver por cada <a> y
+# no transfiere el page_source completo. La regex es la de email_prefilter.EMAIL_REGEX.
+SCRIPT_EXTRACCION = """
+const re = /[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\\.[a-zA-Z0-9-.]+/g;
+const hrefs = new Set();
+for (const a of document.getElementsByTagName('a')) {
+    const h = a.href;
+    if (typeof h === 'string' && h) hrefs.add(h);
+}
+let html = document.documentElement ? document.documentElement.outerHTML : '';
+html = html.split('%40').join('@').split('&#64;').join('@');
+return {
+    url: window.location.href,
+    hrefs: Array.from(hrefs),
+    emails: Array.from(new Set(html.match(re) || [])),
+};
+"""
+
+
+def es_url_http(url) -> bool:
+    """Indica si `url` es una cadena HTTP/HTTPS procesable."""
+    return bool(url) and isinstance(url, str) and url.lower().startswith(('http://', 'https://'))
+
+
+def fetch_page(url: str, driver=None, wait_timeout: int = 10, page_load_timeout: float = None) -> PageSnapshot:
+    """
+    Carga la URL una sola vez con Selenium y devuelve un PageSnapshot.
+    - url: dirección HTTP/HTTPS.
+    - driver: instancia Selenium opcional (reutilizable); si no se pasa, se crea y cierra aquí.
+    - wait_timeout: segundos a esperar por el <body>.
+    - page_load_timeout: si se indica, sustituye el timeout de carga configurado en el driver.
+
+    Lanza las excepciones de Selenium (timeout, conexión...) para que el llamador decida.
+    """
+    driver_created = False
+    if driver is None:
+        driver = setup_driver()
+        driver_created = True
+
+    try:
+        if page_load_timeout is not None:
+            driver.set_page_load_timeout(page_load_timeout)
+        driver.get(url)
+        # Espera explícita a que el <body> esté presente (carga completa)
+        WebDriverWait(driver, wait_timeout).until(
+            EC.presence_of_element_located((By.TAG_NAME, 'body'))
+        )
+        # Desplazar hasta el final para cargar contenido dinámico (pies de página, redes)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(1)
+
+        # Una sola llamada: enlaces (incluidos mailto:) y emails del DOM
+        datos = driver.execute_script(SCRIPT_EXTRACCION) or {}
+
+        return PageSnapshot(
+            url=url,
+            final_url=datos.get('url') or url,
+            hrefs=datos.get('hrefs') or [],
+            emails_dom=datos.get('emails') or [],
+        )
+    finally:
+        # Si el driver fue creado aquí, cerrarlo; si se reusa externamente, no tocarlo
+        if driver_created:
+            driver.quit()
@@ -0,0 +1,142 @@
+import asyncio
+import socket
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+from extractor.adaptive_timeouts import TIMEOUTS
+
+# Parámetros de la comprobación previa
+CONCURRENCIA_PREFLIGHT = 100   # Hosts comprobados a la vez
+MAX_DIRECCIONES        = 4     # IPs distintas probadas por host (doble pila, balanceo por DNS)
+
+# Códigos de motivo para los sitios descartados
+MOTIVO_DNS        = "dns_inexistente"    # El dominio no resuelve (caducado o mal escrito)
+MOTIVO_RECHAZADA  = "tcp_rechazada"      # Resuelve, pero ningún puerto web acepta conexiones
+MOTIVO_TIMEOUT    = "tcp_timeout"        # Resuelve, pero la conexión no se completa a tiempo
+MOTIVO_RED        = "tcp_inalcanzable"   # Sin ruta hasta la IP (direcciones privadas, aparcados...)
+
+# Errores de getaddrinfo que indican que el nombre no existe (no fallos transitorios)
+_ERRORES_NOMBRE = {socket.EAI_NONAME} | (
+    {socket.EAI_NODATA} if hasattr(socket, "EAI_NODATA") else set()
+)
+
+_stats_lock = threading.Lock()
+PREFLIGHT_STATS = Counter()
+
+
+def _puertos(url: str):
+    """(host, puertos a probar): el de la URL primero y después el otro puerto web estándar."""
+    partes = urlsplit(url)
+    host = (partes.hostname or "").rstrip(".")
+    try:
+        puerto = partes.port
+    except ValueError:
+        puerto = None
+    if puerto:
+        return host, (puerto,)
+    return host, (443, 80) if partes.scheme == "https" else (80, 443)
+
+
+async def _conectar(host: str, puerto: int, timeout: float):
+    """Devuelve None si el puerto acepta la conexión, o el motivo del fallo."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, puerto), timeout)
+    except asyncio.TimeoutError:
+        return MOTIVO_TIMEOUT
+    except ConnectionRefusedError:
+        return MOTIVO_RECHAZADA
+    except socket.gaierror as e:
+        return MOTIVO_DNS if e.errno in _ERRORES_NOMBRE else None
+    except OSError:
+        return MOTIVO_RED
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return None
+
+
+async def _comprobar(host: str, puertos, timeout: float):
+    """Motivo por el que el host es inalcanzable, o None si alguno de sus puertos responde."""
+    loop = asyncio.get_running_loop()
+    try:
+        direcciones = await loop.getaddrinfo(host, puertos[0], type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        # Solo un 'no existe' definitivo descarta el sitio; los fallos transitorios pasan
+        return MOTIVO_DNS if e.errno in _ERRORES_NOMBRE else None
+    if not direcciones:
+        return MOTIVO_DNS
+
+    motivos = []
+    for ip in _direcciones_a_probar(direcciones):
+        for puerto in puertos:
+            motivo = await _conectar(ip, puerto, timeout)
+            if motivo is None:
+                return None
+            motivos.append(motivo)
+    # Un timeout pesa más que un rechazo, y un rechazo más que una red inalcanzable
+    # (p.ej. una IPv6 sin ruta desde esta máquina junto a una IPv4 que sí responde)
+    for motivo in (MOTIVO_TIMEOUT, MOTIVO_RECHAZADA):
+        if motivo in motivos:
+            return motivo
+    return motivos[0]
+
+
+def _direcciones_a_probar(direcciones) -> list:
+    """
+    IPs distintas de la respuesta de getaddrinfo, empezando por una de cada familia
+    (IPv4 / IPv6), hasta MAX_DIRECCIONES.
+    """
+    ips = list(dict.fromkeys((familia, sockaddr[0]) for familia, _, _, _, sockaddr in direcciones))
+    primeras = list({familia: (familia, ip) for familia, ip in reversed(ips)}.values())[::-1]
+    ordenadas = primeras + [par for par in ips if par not in primeras]
+    return [ip for _, ip in ordenadas[:MAX_DIRECCIONES]]
+
+
+async def _comprobar_todos(objetivos: dict, concurrencia: int, timeout: float):
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una(clave):
+        async with semaforo:
+            return clave, await _comprobar(clave[0], clave[1], timeout)
+
+    return dict(await asyncio.gather(*(una(clave) for clave in objetivos)))
+
+
+def comprobar_alcance(urls, concurrencia: int = CONCURRENCIA_PREFLIGHT, timeout: float = None) -> dict:
+    """
+    Comprobación previa de DNS y conexión TCP (puertos 443/80) sobre los hosts únicos de `urls`.
+    - timeout: segundos por intento de conexión; por defecto, el presupuesto de conexión adaptativo.
+
+    Retorna {url: motivo} solo para las URLs inalcanzables (ver MOTIVO_*).
+    Ante la duda (fallo DNS transitorio) la URL se considera alcanzable.
+    """
+    if timeout is None:
+        timeout = TIMEOUTS.timeout('conexion')
+    por_objetivo = {}
+    for url in urls:
+        host, puertos = _puertos(url)
+        if host:
+            por_objetivo.setdefault((host, puertos), []).append(url)
+    if not por_objetivo:
+        return {}
+
+    resultados = asyncio.run(_comprobar_todos(por_objetivo, concurrencia, timeout))
+
+    descartadas = {}
+    for clave, motivo in resultados.items():
+        if motivo is not None:
+            for url in por_objetivo[clave]:
+                descartadas[url] = motivo
+    with _stats_lock:
+        PREFLIGHT_STATS['comprobados'] += len(resultados)
+        PREFLIGHT_STATS.update(motivo for motivo in resultados.values() if motivo)
+    return descartadas
+
+
+def resumen_preflight() -> dict:
+    """Copia de los contadores: hosts comprobados y descartados por motivo."""
+    with _stats_lock:
+        return dict(PREFLIGHT_STATS)
@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from extractor.utils import normalizar_url_pagina
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RUTA_CACHE_SITIOS = BASE_DIR / "data" / "cache" / "sitios.sqlite"
+
+# Parámetros por defecto
+TTL_DIAS      = 30        # Validez de un resultado
+MAX_ENTRADAS  = 200000    # Sitios guardados como máximo
+PODA_CADA     = 500       # Revisar el tamaño cada N escrituras
+
+# Modos de uso
+MODO_USAR      = "usar"       # Leer y escribir
+MODO_REFRESCAR = "refrescar"  # No leer (volver a scrapear) pero sí actualizar
+MODO_IGNORAR   = "ignorar"    # Ni leer ni escribir
+
+
+class SiteCache:
+    """
+    Caché persistente (SQLite) de resultados de extracción por sitio web, entre ejecuciones.
+    - Clave: página normalizada (host sin 'www.' + ruta, sin esquema, query ni fragmento),
+      la misma que agrupa las filas dentro de una ejecución.
+    - Valor: emails y redes sociales extraídos.
+    - Caducidad por TTL y expulsión LRU (último acceso) al superar `max_entradas`.
+    """
+
+    def __init__(
+        self,
+        ruta: Path = RUTA_CACHE_SITIOS,
+        ttl_dias: float = TTL_DIAS,
+        max_entradas: int = MAX_ENTRADAS,
+        modo: str = MODO_USAR,
+    ):
+        self.ruta = Path(ruta)
+        self.ttl = ttl_dias * 86400
+        self.max_entradas = max_entradas
+        self.modo = modo
+        self.hits = 0
+        self.misses = 0
+        self._escrituras = 0
+        self._lock = threading.Lock()
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.ruta), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # La tabla 'sitios' de versiones anteriores usaba el host como clave (páginas distintas
+        # de un mismo host se pisaban): se descarta
+        self._conn.execute("DROP TABLE IF EXISTS sitios")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paginas (
+                clave         TEXT PRIMARY KEY,
+                resultado     TEXT NOT NULL,
+                guardado      REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_paginas_acceso ON paginas (ultimo_acceso)")
+        self._conn.commit()
+
+    def obtener(self, url: str):
+        """
+        Devuelve (emails, redes) cacheados para la URL, o None si no hay resultado vigente
+        (o el modo no permite leer).
+        """
+        if self.modo != MODO_USAR:
+            return None
+        clave = normalizar_url_pagina(url)
+        if not clave:
+            return None
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT resultado, guardado FROM paginas WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None or fila[1] + self.ttl < ahora:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE paginas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+            self._conn.commit()
+            self.hits += 1
+        datos = json.loads(fila[0])
+        return datos.get("emails", []), datos.get("redes", {})
+
+    def guardar(self, url: str, emails: list, redes: dict):
+        """Guarda el resultado de extracción de la URL (salvo en modo 'ignorar')."""
+        if self.modo == MODO_IGNORAR:
+            return
+        clave = normalizar_url_pagina(url)
+        if not clave:
+            return
+        ahora = time.time()
+        datos = json.dumps({"emails": list(emails), "redes": redes}, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paginas (clave, resultado, guardado, ultimo_acceso) VALUES (?, ?, ?, ?)",
+                (clave, datos, ahora, ahora),
+            )
+            self._conn.commit()
+            self._escrituras += 1
+            if self._escrituras % PODA_CADA == 0:
+                self._podar()
+
+    def _podar(self):
+        """Elimina caducados y, si sobra, los de acceso más antiguo (llamar con el lock)."""
+        self._conn.execute("DELETE FROM paginas WHERE guardado < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+        if total > self.max_entradas:
+            self._conn.execute(
+                "DELETE FROM paginas WHERE clave IN "
+                "(SELECT clave FROM paginas ORDER BY ultimo_acceso LIMIT ?)",
+                (total - self.max_entradas,),
+            )
+        self._conn.commit()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'ratio': (self.hits / total) if total else 0.0,
+            }
+
+    def cerrar(self):
+        with self._lock:
+            self._podar()
+            self._conn.close()
@@ -0,0 +1,73 @@
+import smtplib
+import threading
+from concurrent.futures import Future
+
+# Parámetros de la sonda SMTP
+SMTP_TIMEOUT      = 5    # Segundos por conexión
+SMTP_PUERTO       = 25
+MAX_SONDAS_TOTAL  = 16   # Conexiones SMTP simultáneas en todo el proceso
+
+
+class SMTPProber:
+    """
+    Sonda de actividad SMTP memoizada por host MX.
+    - Cada host se sondea una sola vez por ejecución; el resultado se reutiliza
+      para todas las direcciones y ficheros que comparten ese MX.
+    - Si varios hilos piden el mismo host a la vez, solo uno conecta y el resto
+      espera su resultado (como mucho una conexión por host).
+    - El total de conexiones simultáneas está acotado por `max_total`.
+    """
+
+    def __init__(self, timeout: int = SMTP_TIMEOUT, puerto: int = SMTP_PUERTO, max_total: int = MAX_SONDAS_TOTAL):
+        self.timeout = timeout
+        self.puerto = puerto
+        self._resultados = {}   # host -> Future[bool]
+        self._lock = threading.Lock()
+        self._semaforo = threading.BoundedSemaphore(max_total)
+
+    def probar(self, host: str) -> bool:
+        """Devuelve True si el servidor SMTP de `host` acepta conexiones."""
+        host = host.lower().rstrip('.')
+        with self._lock:
+            futuro = self._resultados.get(host)
+            propietario = futuro is None
+            if propietario:
+                futuro = Future()
+                self._resultados[host] = futuro
+
+        if propietario:
+            try:
+                futuro.set_result(self._conectar(host))
+            except Exception as e:
+                futuro.set_exception(e)
+        return futuro.result()
+
+    def _conectar(self, host: str) -> bool:
+        with self._semaforo:
+            try:
+                server = smtplib.SMTP(timeout=self.timeout)
+                server.connect(host, self.puerto)
+                server.quit()
+                return True
+            except Exception:
+                return False
+
+    def olvidar(self, host: str = None):
+        """Descarta el resultado memoizado de `host` (o de todos si no se indica)."""
+        with self._lock:
+            if host is None:
+                self._resultados.clear()
+            else:
+                self._resultados.pop(host.lower().rstrip('.'), None)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            hechos = [f for f in self._resultados.values() if f.done() and not f.exception()]
+            return {
+                'hosts': len(self._resultados),
+                'activos': sum(1 for f in hechos if f.result()),
+            }
+
+
+# Sonda compartida por todo el proceso (se reutiliza entre ficheros)
+SMTP_PROBER = SMTPProber()
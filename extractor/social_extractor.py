@@ -1,10 +1,65 @@
-import time
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
 
-from extractor.utils import setup_driver
+from extractor.page_fetcher import PageSnapshot, es_url_http, fetch_page
+
+
+def clasificar_enlaces_sociales(urls):
+    """
+    Clasifica una lista de URLs en redes sociales esenciales.
+
+    Retorna dict con claves 'facebook','instagram','linkedin','x' y listas de URLs
+    (solo las redes con algún enlace).
+    """
+    found = {"facebook": [], "instagram": [], "linkedin": [], "x": []}
+
+    for u in urls:
+        # Facebook: perfiles/páginas, no compartidos
+        if "facebook.com/" in u and "sharer" not in u and "share" not in u and len(u) < 100:
+            found["facebook"].append(u)
+        # Instagram: perfiles, no compartir o stories
+        elif "instagram.com/" in u and "share" not in u and "stories" not in u and len(u) < 100:
+            found["instagram"].append(u)
+        # LinkedIn: /in/ o /company/, no compartir
+        elif (
+            "linkedin.com/" in u and
+            ("/in/" in u or "/company/" in u) and
+            "share" not in u and
+            "sharing" not in u and
+            len(u) < 100
+        ):
+            found["linkedin"].append(u)
+        # X / Twitter: perfiles, no compartir o intent
+        elif (
+            ("x.com/" in u or "twitter.com/" in u) and
+            "share" not in u and
+            "intent" not in u and
+            len(u) < 100
+        ):
+            found["x"].append(u)
+
+    # Eliminar duplicados
+    for key in found:
+        found[key] = list(set(found[key]))
+
+    return {k: v for k, v in found.items() if v}
+
+
+def extract_essential_social_links_from_snapshot(snapshot: PageSnapshot):
+    """
+    Extrae enlaces esenciales a redes sociales de una página ya cargada.
+    - snapshot: PageSnapshot devuelto por fetch_page.
+
+    Retorna dict con claves 'facebook','instagram','linkedin','x' y listas de URLs.
+    """
+    print(f"🔍 {len(snapshot.hrefs)} enlaces encontrados. Filtrando redes sociales...")
+    redes = clasificar_enlaces_sociales(snapshot.hrefs)
+
+    if redes:
+        print(f"🔗 Redes encontradas en {snapshot.url}: {', '.join(redes)}")
+    else:
+        print(f"ℹ️ No se encontraron redes sociales en {snapshot.url}")
+
+    return redes
 
 
 def extract_essential_social_links_from_url(
@@ -16,74 +71,20 @@ def extract_essential_social_links_from_url(
     Extrae enlaces esenciales a redes sociales desde la URL dada.
     - url: dirección HTTP/HTTPS.
     - driver: instancia Selenium opcional (reutilizable).
-    - wait_timeout: tiempo máximo a esperar por <a>.
+    - wait_timeout: tiempo máximo a esperar por <body>.
 
     Retorna dict con claves 'facebook','instagram','linkedin','x' y listas de URLs.
     """
-    if not url or not isinstance(url, str) or not url.lower().startswith(('http://', 'https://')):
+    if not es_url_http(url):
         print(f"⚠️ URL inválida, saltando: {url}")
         return {}
 
-    driver_created = False
-    if driver is None:
-        driver = setup_driver()
-        driver_created = True
-
     try:
         print(f"\n🌐 Procesando URL: {url}")
         print("⏳ Cargando página...")
-        driver.get(url)
-        # Espera explícita a que al menos un enlace <a> esté presente
-        WebDriverWait(driver, wait_timeout).until(
-            EC.presence_of_all_elements_located((By.TAG_NAME, 'a'))
-        )
-        # Opcional: desplazar hasta el final para cargar contenido dinámico
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
+        snapshot = fetch_page(url, driver=driver, wait_timeout=wait_timeout)
         print("✅ Página cargada y enlaces listos.")
-
-        links = driver.find_elements(By.TAG_NAME, 'a')
-        print(f"🔍 {len(links)} enlaces encontrados. Filtrando redes sociales...")
-
-        urls = [link.get_attribute('href') for link in links if link.get_attribute('href')]
-        found = {"facebook": [], "instagram": [], "linkedin": [], "x": []}
-
-        for u in urls:
-            # Facebook: perfiles/páginas, no compartidos
-            if "facebook.com/" in u and "sharer" not in u and "share" not in u and len(u) < 100:
-                found["facebook"].append(u)
-            # Instagram: perfiles, no compartir o stories
-            elif "instagram.com/" in u and "share" not in u and "stories" not in u and len(u) < 100:
-                found["instagram"].append(u)
-            # LinkedIn: /in/ o /company/, no compartir
-            elif (
-                "linkedin.com/" in u and
-                ("/in/" in u or "/company/" in u) and
-                "share" not in u and
-                "sharing" not in u and
-                len(u) < 100
-            ):
-                found["linkedin"].append(u)
-            # X / Twitter: perfiles, no compartir o intent
-            elif (
-                ("x.com/" in u or "twitter.com/" in u) and
-                "share" not in u and
-                "intent" not in u and
-                len(u) < 100
-            ):
-                found["x"].append(u)
-
-        # Eliminar duplicados
-        for key in found:
-            found[key] = list(set(found[key]))
-
-        redes_encontradas = [k for k, v in found.items() if v]
-        if redes_encontradas:
-            print(f"🔗 Redes encontradas en {url}: {', '.join(redes_encontradas)}")
-        else:
-            print(f"ℹ️ No se encontraron redes sociales en {url}")
-
-        return {k: v for k, v in found.items() if v}
+        return extract_essential_social_links_from_snapshot(snapshot)
 
     except TimeoutException:
         print(f"⏱️ Timeout al cargar {url}")
@@ -91,7 +92,3 @@ def extract_essential_social_links_from_url(
     except Exception as e:
         print(f"❌ Error al extraer redes sociales de {url}: {e}")
         return {}
-    finally:
-        if driver_created:
-            print("🧹 Cerrando navegador...")
-            driver.quit()
@@ -1,5 +1,6 @@
 import platform
 from pathlib import Path
+from urllib.parse import urlsplit
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -60,3 +61,68 @@ def setup_driver(
     driver.implicitly_wait(implicit_wait)
 
     return driver
+
+
+# Plataformas donde muchos negocios distintos comparten host: la ruta identifica al negocio
+HOSTS_COMPARTIDOS = {
+    "facebook.com", "instagram.com", "linkedin.com", "twitter.com", "x.com",
+    "linktr.ee", "sites.google.com", "business.site", "wa.me", "youtube.com", "tiktok.com",
+}
+SUFIJOS_COMPARTIDOS = (".wixsite.com", ".blogspot.com", ".wordpress.com", ".business.site", ".negocio.site")
+
+
+def normalizar_host(url: str) -> str:
+    """
+    Devuelve el host normalizado de una URL: minúsculas, sin puerto, sin 'www.' ni punto final.
+    Retorna '' si la URL no tiene host.
+    """
+    if not url or not isinstance(url, str):
+        return ""
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def normalizar_url(url: str) -> str:
+    """
+    Clave canónica de un sitio web: el host normalizado y, en plataformas compartidas
+    (Facebook, Linktree, Wix...), también la ruta, sin esquema, query ni fragmento.
+    """
+    host = normalizar_host(url)
+    if not host:
+        return ""
+    if host in HOSTS_COMPARTIDOS or host.endswith(SUFIJOS_COMPARTIDOS):
+        url = url.strip()
+        if "://" not in url:
+            url = "http://" + url
+        ruta = urlsplit(url).path.rstrip("/").lower()
+        return f"{host}{ruta}"
+    return host
+
+
+def normalizar_url_pagina(url: str) -> str:
+    """
+    Clave de una página concreta: host normalizado + ruta (sin barra final), sin esquema,
+    query ni fragmento. Dos filas con la misma clave cargan exactamente la misma página.
+    """
+    host = normalizar_host(url)
+    if not host:
+        return ""
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        ruta = urlsplit(url).path.rstrip("/")
+    except ValueError:
+        return ""
+    if host in HOSTS_COMPARTIDOS or host.endswith(SUFIJOS_COMPARTIDOS):
+        ruta = ruta.lower()
+    return f"{host}{ruta}"
@@ -0,0 +1,236 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RUTA_COLA = BASE_DIR / "data" / "cola" / "cola.sqlite"
+
+# Parámetros por defecto de la cola
+LEASE_SEGUNDOS  = 300    # Tiempo que un trabajador puede retener un lote sin renovarlo
+MAX_INTENTOS    = 3      # Reintentos de un lote antes de darlo por fallido
+
+# Estados de un lote
+PENDIENTE = "pendiente"
+EN_CURSO  = "en_curso"
+HECHO     = "hecho"
+FALLIDO   = "fallido"
+
+
+def id_trabajador() -> str:
+    """Identificador único del proceso trabajador (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Cola de trabajo duradera (SQLite) de lotes de filas, compartida por un coordinador
+    y N procesos trabajadores del mismo host. El fichero usa el modo WAL, que depende de
+    memoria compartida: no debe ponerse en una unidad de red (SMB/NFS) ni abrirse desde otros hosts.
+    - El coordinador encola lotes con `encolar`, recoge resultados con `recoger` y suma
+      los contadores que envían los trabajadores con `contadores`.
+    - Cada trabajador toma un lote con `tomar`, que lo alquila durante `lease` segundos;
+      debe renovarlo con `renovar` mientras trabaja y entregarlo con `completar`.
+    - Si un trabajador muere, su alquiler caduca y otro trabajador retoma el lote
+      (hasta `max_intentos` veces).
+    """
+
+    def __init__(self, ruta: Path = RUTA_COLA, lease: int = LEASE_SEGUNDOS, max_intentos: int = MAX_INTENTOS):
+        self.ruta = Path(ruta)
+        self.lease = lease
+        self.max_intentos = max_intentos
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None: transacciones explícitas (BEGIN IMMEDIATE) para tomar lotes sin carreras
+        self._conn = sqlite3.connect(str(self.ruta), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lotes (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                archivo     TEXT    NOT NULL,
+                items       TEXT    NOT NULL,
+                estado      TEXT    NOT NULL,
+                trabajador  TEXT,
+                lease_hasta REAL,
+                intentos    INTEGER NOT NULL DEFAULT 0,
+                resultados  TEXT,
+                contadores  TEXT,
+                recogido    INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Colas creadas antes de que los trabajadores enviaran contadores
+        columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(lotes)")}
+        if 'contadores' not in columnas:
+            self._conn.execute("ALTER TABLE lotes ADD COLUMN contadores TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lotes_estado ON lotes (estado, lease_hasta)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS control (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    # ---------------- Coordinador ----------------
+    def encolar(self, archivo: str, items: list, tamano_lote: int) -> int:
+        """Divide `items` (serializables a JSON) en lotes de `tamano_lote` y los encola. Retorna nº de lotes."""
+        lotes = [
+            (archivo, json.dumps(items[i:i + tamano_lote], ensure_ascii=False, default=str), PENDIENTE)
+            for i in range(0, len(items), tamano_lote)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("INSERT INTO lotes (archivo, items, estado) VALUES (?, ?, ?)", lotes)
+            self._conn.execute("COMMIT")
+        return len(lotes)
+
+    def recoger(self, archivo: str):
+        """
+        Devuelve los resultados de los lotes de `archivo` terminados desde la última llamada
+        (lista de resultados de todos esos lotes) y los marca como recogidos.
+        """
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT id, resultados FROM lotes WHERE archivo = ? AND estado = ? AND recogido = 0",
+                (archivo, HECHO),
+            ).fetchall()
+            if filas:
+                self._conn.executemany("UPDATE lotes SET recogido = 1 WHERE id = ?", [(i,) for i, _ in filas])
+        resultados = []
+        for _, datos in filas:
+            resultados.extend(json.loads(datos))
+        return resultados
+
+    def contadores(self, archivo: str) -> Counter:
+        """Suma de los contadores entregados con los lotes terminados de `archivo`."""
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT contadores FROM lotes WHERE archivo = ? AND estado = ? AND contadores IS NOT NULL",
+                (archivo, HECHO),
+            ).fetchall()
+        total = Counter()
+        for (datos,) in filas:
+            total.update(json.loads(datos))
+        return total
+
+    def fallidos(self, archivo: str) -> list:
+        """Items de los lotes de `archivo` que agotaron los reintentos (y los marca como recogidos)."""
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT id, items FROM lotes WHERE archivo = ? AND estado = ? AND recogido = 0",
+                (archivo, FALLIDO),
+            ).fetchall()
+            if filas:
+                self._conn.executemany("UPDATE lotes SET recogido = 1 WHERE id = ?", [(i,) for i, _ in filas])
+        items = []
+        for _, datos in filas:
+            items.extend(json.loads(datos))
+        return items
+
+    def pendientes(self, archivo: str) -> int:
+        """Lotes de `archivo` que aún no se han recogido (en cola, en curso o por recoger)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM lotes WHERE archivo = ? AND recogido = 0", (archivo,)
+            ).fetchone()[0]
+
+    def purgar(self, archivo: str):
+        """Elimina todos los lotes de `archivo` (p.ej. restos de una ejecución interrumpida)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM lotes WHERE archivo = ?", (archivo,))
+
+    def abrir(self):
+        """Marca la cola como activa: los trabajadores esperan nuevos lotes en vez de salir."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO control (clave, valor) VALUES ('cerrada', '0')")
+
+    def cerrar_cola(self):
+        """Indica a los trabajadores que no habrá más lotes: salen al vaciarse la cola."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO control (clave, valor) VALUES ('cerrada', '1')")
+
+    def cerrada(self) -> bool:
+        with self._lock:
+            fila = self._conn.execute("SELECT valor FROM control WHERE clave = 'cerrada'").fetchone()
+        return fila is not None and fila[0] == '1'
+
+    def estadisticas(self) -> dict:
+        """Lotes por estado y reintentos acumulados."""
+        with self._lock:
+            por_estado = dict(self._conn.execute("SELECT estado, COUNT(*) FROM lotes GROUP BY estado").fetchall())
+            reintentos = self._conn.execute(
+                "SELECT COALESCE(SUM(MAX(intentos - 1, 0)), 0) FROM lotes"
+            ).fetchone()[0]
+        return {**por_estado, 'reintentos': reintentos}
+
+    # ---------------- Trabajadores ----------------
+    def tomar(self, trabajador: str):
+        """
+        Alquila el siguiente lote disponible (pendiente o con el alquiler caducado).
+        Retorna (id, archivo, items) o None si no hay nada que hacer.
+        """
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Los lotes abandonados que ya agotaron sus intentos se dan por fallidos
+                self._conn.execute(
+                    "UPDATE lotes SET estado = ? WHERE estado = ? AND lease_hasta < ? AND intentos >= ?",
+                    (FALLIDO, EN_CURSO, ahora, self.max_intentos),
+                )
+                fila = self._conn.execute(
+                    "SELECT id, archivo, items FROM lotes "
+                    "WHERE estado = ? OR (estado = ? AND lease_hasta < ?) ORDER BY id LIMIT 1",
+                    (PENDIENTE, EN_CURSO, ahora),
+                ).fetchone()
+                if fila is not None:
+                    self._conn.execute(
+                        "UPDATE lotes SET estado = ?, trabajador = ?, lease_hasta = ?, intentos = intentos + 1 "
+                        "WHERE id = ?",
+                        (EN_CURSO, trabajador, ahora + self.lease, fila[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if fila is None:
+            return None
+        return fila[0], fila[1], json.loads(fila[2])
+
+    def renovar(self, id_lote: int, trabajador: str) -> bool:
+        """Prolonga el alquiler del lote; False si ya no pertenece a este trabajador."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lotes SET lease_hasta = ? WHERE id = ? AND trabajador = ? AND estado = ?",
+                (time.time() + self.lease, id_lote, trabajador, EN_CURSO),
+            )
+            return cursor.rowcount == 1
+
+    def completar(self, id_lote: int, trabajador: str, resultados: list, contadores: dict = None) -> bool:
+        """
+        Entrega los resultados del lote y, opcionalmente, los contadores numéricos que generó
+        (se suman en `contadores`); se ignoran si el alquiler pasó a otro trabajador.
+        """
+        datos = json.dumps(resultados, ensure_ascii=False, default=str)
+        stats = json.dumps(contadores) if contadores else None
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lotes SET estado = ?, resultados = ?, contadores = ?, lease_hasta = NULL "
+                "WHERE id = ? AND trabajador = ? AND estado = ?",
+                (HECHO, datos, stats, id_lote, trabajador, EN_CURSO),
+            )
+            return cursor.rowcount == 1
+
+    def devolver(self, id_lote: int, trabajador: str):
+        """Libera un lote que el trabajador no pudo terminar, para que otro lo reintente."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE lotes SET estado = CASE WHEN intentos >= ? THEN ? ELSE ? END, lease_hasta = NULL "
+                "WHERE id = ? AND trabajador = ? AND estado = ?",
+                (self.max_intentos, FALLIDO, PENDIENTE, id_lote, trabajador, EN_CURSO),
+            )
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
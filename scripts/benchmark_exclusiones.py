@@ -0,0 +1,91 @@
+"""
+Benchmark del filtrado de emails de main_xclusionEmail:
+compara el bucle original (cada email contra cada token) con el ExclusionMatcher
+compilado y vectorizado, sobre un DataFrame sintético, y comprueba que ambos coinciden.
+
+Instrucciones:
+ 1. Ajusta FILAS y EMAILS_POR_FILA.
+ 2. Desde la carpeta raíz del proyecto ejecuta:
+     python scripts/benchmark_exclusiones.py
+"""
+
+import sys, os
+# Asegura que Python encuentre el paquete extractor y los scripts
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+from extractor.exclusion_matcher import ExclusionMatcher, EXCLUSIONES_FOLDER, cargar_exclusiones
+from main_xclusionEmail import filtrar_y_contar
+
+FILAS = 20000
+EMAILS_POR_FILA = 3
+SEMILLA = 42
+
+
+# Implementación anterior, como referencia
+def filtrar_original(df: pd.DataFrame, exclusiones: set):
+    orig_listas = df["email"].fillna("").apply(
+        lambda cell: [e.strip() for e in str(cell).replace(';', ',').split(',') if e.strip()]
+    )
+    orig_counts = orig_listas.apply(len)
+
+    filt_listas = orig_listas.apply(
+        lambda lst: [e for e in lst if not any(tok in e.lower() for tok in exclusiones)]
+    )
+    filt_counts = filt_listas.apply(len)
+
+    df_filtrado = df.copy()
+    df_filtrado["email"] = filt_listas.apply(lambda lst: ", ".join(lst) if lst else pd.NA)
+    return df_filtrado, int((orig_counts - filt_counts).sum())
+
+
+def datos_sinteticos(exclusiones: set) -> pd.DataFrame:
+    random.seed(SEMILLA)
+    tokens = sorted(exclusiones)
+    celdas = []
+    for _ in range(FILAS):
+        emails = []
+        for _ in range(random.randint(0, EMAILS_POR_FILA)):
+            if random.random() < 0.3:
+                local = random.choice(tokens).replace(" ", "") + str(random.randint(1, 99))
+            else:
+                local = "".join(random.choices("bcdfghkmqvwxz", k=8))
+            emails.append(f"{local}@empresa{random.randint(1, 500)}.com")
+        celdas.append("; ".join(emails) if emails else None)
+    return pd.DataFrame({"name": range(FILAS), "email": celdas})
+
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+if __name__ == '__main__':
+    exclusiones = cargar_exclusiones(EXCLUSIONES_FOLDER)
+    df = datos_sinteticos(exclusiones)
+    print(f"📋 {len(exclusiones)} tokens, {FILAS} filas, {df['email'].str.count('@').sum():.0f} emails\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = Path(tmp) / "exclusiones.json"
+        _, t_construir = cronometrar(ExclusionMatcher.desde_carpeta, EXCLUSIONES_FOLDER, cache)
+        matcher, t_cache = cronometrar(ExclusionMatcher.desde_carpeta, EXCLUSIONES_FOLDER, cache)
+
+    (df_orig, elim_orig), t_orig = cronometrar(filtrar_original, df, exclusiones)
+    (df_nuevo, elim_nuevo, _), t_nuevo = cronometrar(filtrar_y_contar, df, matcher)
+
+    coinciden = elim_orig == elim_nuevo and df_orig["email"].fillna("").equals(df_nuevo["email"].fillna(""))
+    print(pd.DataFrame([
+        {"etapa": "construir matcher", "segundos": t_construir},
+        {"etapa": "matcher desde caché", "segundos": t_cache},
+        {"etapa": "filtrado original", "segundos": t_orig},
+        {"etapa": "filtrado compilado", "segundos": t_nuevo},
+    ]).to_string(index=False))
+    print(f"\nAceleración: x{t_orig / t_nuevo:.1f}  |  Emails eliminados: {elim_nuevo}  |  "
+          f"{'✅ Resultados idénticos' if coinciden else '❌ Los resultados difieren'}")
@@ -18,8 +18,9 @@ import time
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
 from extractor.utils import setup_driver
-from extractor.email_extractor import extract_emails_from_url
-from extractor.social_extractor import extract_essential_social_links_from_url
+from extractor.page_fetcher import fetch_page
+from extractor.email_extractor import extract_emails_from_snapshot
+from extractor.social_extractor import extract_essential_social_links_from_snapshot
 
 # Lista de URLs de prueba
 test_urls = [
@@ -32,18 +33,14 @@ worker_options = [1, 2, 4, 8]
 wait_timeout_options = [5, 10, 15]
 
 # Función de prueba para un solo URL y driver
+# (los errores de carga no abortan el benchmark: cuentan como una URL fallida, como antes)
 def run_once(url, wait_timeout, driver):
-    extract_emails_from_url(
-        url,
-        driver=driver,
-        wait_timeout=wait_timeout,
-        modo_verificacion='avanzado'
-    )
-    extract_essential_social_links_from_url(
-        url,
-        driver=driver,
-        wait_timeout=wait_timeout
-    )
+    try:
+        snapshot = fetch_page(url, driver=driver, wait_timeout=wait_timeout)
+        extract_emails_from_snapshot(snapshot, modo_verificacion='avanzado')
+        extract_essential_social_links_from_snapshot(snapshot)
+    except Exception as e:
+        print(f"❌ Error en {url}: {e}")
 
 results = []
 for workers in worker_options:
@@ -52,22 +49,24 @@ for workers in worker_options:
         drivers = []
         futures = []
 
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            for url in test_urls:
-                # Crear un driver por tarea y almacenarlo para cierre
-                drv = setup_driver()
-                drivers.append(drv)
-                futures.append(
-                    executor.submit(run_once, url, wait_timeout, drv)
-                )
-            # Esperar a todas las ejecuciones
-            for f in futures:
-                f.result()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for url in test_urls:
+                    # Crear un driver por tarea y almacenarlo para cierre
+                    drv = setup_driver()
+                    drivers.append(drv)
+                    futures.append(
+                        executor.submit(run_once, url, wait_timeout, drv)
+                    )
+                # Esperar a todas las ejecuciones
+                for f in futures:
+                    f.result()
 
-        total = time.perf_counter() - start
-        # Cerrar todos los drivers
-        for drv in drivers:
-            drv.quit()
+            total = time.perf_counter() - start
+        finally:
+            # Cerrar todos los drivers, también si algo falló
+            for drv in drivers:
+                drv.quit()
 
         results.append({
             'workers': workers,
@@ -2,40 +2,84 @@
 import sys
 import os
 import subprocess
+import glob
 import shutil
 import pandas as pd
 import time
 import logging
 import signal
 import psutil
+import itertools
+import queue
 import threading
+from collections import Counter, deque
 from concurrent.futures import ThreadPoolExecutor
+from selenium.common.exceptions import TimeoutException
 
 # Añadir ruta del proyecto
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # Importaciones internas
-from extractor.utils import setup_driver as _shared_setup_driver
-from extractor.email_extractor import extract_emails_from_url
-from extractor.social_extractor import extract_essential_social_links_from_url
-from extractor.column_editor import procesar_csvs_en_carpeta
-from extractor.generador_excel import generar_excel
+from extractor.browser_pool import BrowserPool
+from extractor.page_fetcher import fetch_page
+from extractor.http_fetcher import fetch_page_auto, resumen_fetch, es_error_definitivo
+from extractor.email_extractor import extract_emails_from_snapshot
+from extractor.social_extractor import extract_essential_social_links_from_snapshot
+from extractor.dns_cache import DNS_CACHE
+from extractor.email_prefilter import resumen_prefiltro
+from extractor.smtp_probe import SMTP_PROBER
+from extractor.checkpoint import CheckpointJournal
+from extractor.site_cache import SiteCache
+from extractor.host_scheduler import HOST_SCHEDULER, intercalar
+from extractor.adaptive_timeouts import TIMEOUTS
+from extractor.preflight import comprobar_alcance, resumen_preflight
+from extractor.work_queue import WorkQueue
+from extractor.utils import normalizar_url_pagina, normalizar_host, setup_driver
+from extractor.column_plan import PlanColumnas, leer_cabecera
+from extractor.limpiar_csv_lote import limpiar_lote
+from extractor.generador_excel import generar_excel_por_bloques
 
 # Ctrl+C amigable
 def signal_handler(sig, frame):
     print("\n⏸ Proceso interrumpido. Puedes reanudar o cancelar cuando toque.")
 signal.signal(signal.SIGINT, signal_handler)
 
-# Thread-local para los drivers
-thread_local = threading.local()
-# Lista de drivers creados para cierre posterior
-DRIVERS = []
+# Pool de navegadores compartido por todos los ficheros de la ejecución
+BROWSER_POOL = None
+
+def _get_browser_pool():
+    """Devuelve el pool de navegadores, creándolo la primera vez."""
+    global BROWSER_POOL
+    if BROWSER_POOL is None:
+        # Sin espera implícita: los tiempos de carga los marcan los timeouts adaptativos
+        BROWSER_POOL = BrowserPool(
+            tamano=MAX_WORKERS,
+            deadline=DEADLINE_SITIO,
+            factory=lambda: setup_driver(implicit_wait=0),
+        )
+    return BROWSER_POOL
+
+# Diario de filas terminadas, para reanudar ejecuciones interrumpidas
+JOURNAL = None
+
+def _get_journal():
+    global JOURNAL
+    if JOURNAL is None:
+        JOURNAL = CheckpointJournal()
+    return JOURNAL
+
+# Caché de resultados por sitio web entre ejecuciones
+SITE_CACHE = None
+
+def _get_site_cache():
+    global SITE_CACHE
+    if SITE_CACHE is None:
+        SITE_CACHE = SiteCache(ttl_dias=CACHE_SITIOS_TTL_DIAS, modo=CACHE_SITIOS_MODO)
+    return SITE_CACHE
 
-def _init_thread_driver():
-    """Inicializa un driver por hilo y lo añade a la lista DRIVERS."""
-    drv = _shared_setup_driver()
-    thread_local.driver = drv
-    DRIVERS.append(drv)
+def _cerrar_browser_pool():
+    if BROWSER_POOL is not None:
+        BROWSER_POOL.cerrar()
 
 # Configuración global de rutas
 BASE_DIR           = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -73,105 +117,547 @@ set_low_priority()
 EMAIL_VERIFICATION_MODE = "avanzado"
 modo_prueba             = False
 MAX_WORKERS             = 4  # Número de hilos para scraping
+MOTOR_SCRAPING          = "hilos"  # "hilos" (ThreadPoolExecutor), "asyncio" (alta concurrencia) o "cola" (procesos trabajadores)
+DNS_CACHE_PERSISTENTE   = True     # Guardar la caché DNS de verificación entre ejecuciones
+DEADLINE_SITIO          = 60       # Segundos máximos de navegador por sitio
+CACHE_SITIOS_MODO       = "usar"   # Caché de resultados por sitio: "usar", "refrescar" o "ignorar"
+CACHE_SITIOS_TTL_DIAS   = 30       # Días de validez de un resultado cacheado
+PREFLIGHT_ACTIVO        = True     # Comprobar DNS/TCP de cada web antes de scrapear
+TAMANO_BLOQUE           = 5000     # Filas del CSV leídas por bloque (memoria acotada)
+TAMANO_LOTE             = 50       # Modo cola: webs por lote
+MAX_LOTES_EN_COLA       = 20       # Modo cola: lotes sin recoger antes de leer más filas
+COLA_ETAPAS             = 2        # Ficheros en espera entre etapas del pipeline
+CLAVE_COLA              = "pipeline"  # Modo cola: clave de los lotes de esta ejecución
+TRABAJADORES_LOCALES    = 2        # Modo cola: procesos trabajadores lanzados en este host
 
 # ---------------- Configuración columnas ----------------
-def cargar_lista_desde_txt(nombre_archivo):
-    ruta = os.path.join(TXT_CONFIG_DIR, nombre_archivo)
-    if not os.path.exists(ruta):
-        return []
-    with open(ruta, 'r', encoding='utf-8') as f:
-        return [line.strip() for line in f if line.strip()]
-
-# Columnas a eliminar
-COLUMNAS_A_ELIMINAR = cargar_lista_desde_txt("columnas_eliminar.txt")
-
-# Diccionario de renombrado: formato "antiguo:Nuevo"
-RENOMBRAR_COLUMNAS = {}
-for line in cargar_lista_desde_txt("renombrar_columnas.txt"):
-    if ":" in line:
-        old, new = line.split(":", 1)
-        RENOMBRAR_COLUMNAS[old.strip()] = new.strip()
-
-# Orden de columnas: usa tu fichero real orden_columnas.txt
-NUEVO_ORDEN = cargar_lista_desde_txt("orden_columnas.txt")
+# Plan declarativo (eliminar / renombrar / orden) cargado una vez desde config/txt_config
+PLAN_COLUMNAS = PlanColumnas.desde_config(TXT_CONFIG_DIR)
 
 # ---------------- Funciones de procesamiento ----------------
-def ejecutar_script_limpieza():
-    scripts = [os.path.join(EXTRACTOR_FOLDER, 'limpiar_csv_lote.py')]
-    for script_path in scripts:
-        if not os.path.isfile(script_path):
-            print(f"❌ No se encontró el script: {script_path}")
-            sys.exit(1)
-        print(f"📂 Ejecutando limpieza...")
-        res = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
-        if res.returncode != 0:
-            print(f"❌ Error en limpieza: {res.stderr}")
-            sys.exit(1)
+COLUMNAS_RESULTADO = ['email', 'facebook', 'instagram', 'linkedin', 'x']
+
+def _fila_vacia(row):
+    return {**row, **{c: '' for c in COLUMNAS_RESULTADO}}
+
+def _fila_resultado(row, emails, redes):
+    return {
+        **row,
+        'email':      ', '.join(emails),
+        'facebook':   ', '.join(redes.get('facebook', [])),
+        'instagram':  ', '.join(redes.get('instagram', [])),
+        'linkedin':   ', '.join(redes.get('linkedin', [])),
+        'x':          ', '.join(redes.get('x', [])),
+    }
+
+# Cargas de página evitadas al agrupar filas que comparten web
+CARGAS_AHORRADAS = 0
+
+def _clave_sitio(row):
+    """
+    URL normalizada de la fila (host + ruta, sin esquema, query ni fragmento), o None si no
+    tiene una web http/https. Solo se agrupan filas que cargan la misma página; la caché
+    entre ejecuciones usa la misma clave.
+    """
+    raw = row.get('website', '')
+    if not isinstance(raw, str) or not raw.strip().lower().startswith(('http://', 'https://')):
+        return None
+    return normalizar_url_pagina(raw.strip())
+
+def _fila_desde_cache(row):
+    """Devuelve la fila resuelta con la caché de sitios, o None si hay que scrapearla."""
+    raw = row.get('website', '')
+    if not isinstance(raw, str) or not raw.strip().lower().startswith(('http://', 'https://')):
+        return None
+    cacheado = _get_site_cache().obtener(raw.strip())
+    if cacheado is None:
+        return None
+    emails, redes = cacheado
+    return _fila_resultado(row, emails, redes)
+
+def _procesar_con_snapshot(row, snapshot):
+    """Aplica la extracción de emails y redes a una página ya cargada (None si falló)."""
+    if snapshot is None:
+        return _fila_vacia(row)
+    try:
+        emails = extract_emails_from_snapshot(snapshot, modo_verificacion=EMAIL_VERIFICATION_MODE)
+        redes = extract_essential_social_links_from_snapshot(snapshot)
+        # Un error HTTP (404, 410...) no es "sin emails ni redes": no se cachea
+        if not es_error_definitivo(snapshot):
+            _get_site_cache().guardar(row['website'].strip(), emails, redes)
+        return _fila_resultado(row, emails, redes)
+    except Exception as e:
+        logging.error(f"Error procesando sitio {row.get('website')}: {e}")
+        return _fila_vacia(row)
+
+def _fetch_con_navegador(url):
+    """Respaldo Selenium: carga la URL con un navegador del pool (con deadline duro y timeout adaptativo)."""
+    limite = TIMEOUTS.timeout('navegador')
+    inicio = time.monotonic()
+    try:
+        snapshot = _get_browser_pool().ejecutar(
+            lambda driver: fetch_page(url, driver=driver, wait_timeout=limite, page_load_timeout=limite)
+        )
+    except TimeoutException:
+        TIMEOUTS.registrar_agotado('navegador')
+        raise
+    TIMEOUTS.registrar('navegador', time.monotonic() - inicio)
+    return snapshot
 
 def procesar_sitio(row):
     try:
         raw = row.get('website', '')
         if pd.isna(raw) or not isinstance(raw, str):
-            return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
+            return _fila_vacia(row)
         url = raw.strip()
         if not url.lower().startswith(('http://', 'https://')):
-            return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
+            return _fila_vacia(row)
 
-        emails = extract_emails_from_url(
-            url,
-            modo_verificacion=EMAIL_VERIFICATION_MODE,
-            driver=thread_local.driver,
-            wait_timeout=10
-        )
-        redes = extract_essential_social_links_from_url(
-            url,
-            driver=thread_local.driver,
-            wait_timeout=10
-        )
-        return {
-            **row,
-            'email':      ', '.join(emails),
-            'facebook':   ', '.join(redes.get('facebook', [])),
-            'instagram':  ', '.join(redes.get('instagram', [])),
-            'linkedin':   ', '.join(redes.get('linkedin', [])),
-            'x':          ', '.join(redes.get('x', [])),
-        }
+        # Una sola carga de página (HTTP y, si hace falta, Selenium) compartida por ambos extractores,
+        # con cupo por host/IP para no saturar un mismo servidor
+        with HOST_SCHEDULER.turno(url):
+            snapshot = fetch_page_auto(url, fallback=_fetch_con_navegador)
     except Exception as e:
         logging.error(f"Error procesando sitio {row.get('website')}: {e}")
-        return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
-
-def procesar_archivo(nombre_archivo):
-    path_in  = os.path.join(CLEAN_INPUT_FOLDER, nombre_archivo)
-    path_out = os.path.join(OUTPUT_FOLDER, nombre_archivo)
-    if os.path.exists(path_out) or os.path.getsize(path_in) == 0:
-        return
-
-    df = pd.read_csv(path_in)
-    if 'website' not in df.columns:
+        return _fila_vacia(row)
+    return _procesar_con_snapshot(row, snapshot)
+
+# ---------------- Modo cola (coordinador + trabajadores) ----------------
+COLA = None
+TRABAJADORES = []
+CONTADORES_COLA = Counter()   # Contadores sumados de los lotes que procesaron los trabajadores
+
+def contadores_proceso() -> Counter:
+    """
+    Contadores acumulables de este proceso (caminos de carga, prefiltro, timeouts agotados,
+    cortesía por host, DNS, SMTP y caché de sitios). En modo cola cada trabajador envía
+    con cada lote lo que han crecido, y el coordinador los suma en CONTADORES_COLA.
+    """
+    contadores = Counter()
+    contadores.update({f"fetch:{k}": n for k, n in resumen_fetch().items()})
+    contadores.update({f"prefiltro:{k}": n for k, n in resumen_prefiltro().items()})
+    contadores.update({f"agotados:{etapa}": d['agotados'] for etapa, d in TIMEOUTS.resumen().items()})
+    contadores.update({f"hosts:{k}": n for k, n in HOST_SCHEDULER.estadisticas().items()})
+    stats_dns = DNS_CACHE.estadisticas()
+    contadores.update({'dns:hits': stats_dns['hits'], 'dns:misses': stats_dns['misses']})
+    contadores.update({f"smtp:{k}": n for k, n in SMTP_PROBER.estadisticas().items()})
+    if SITE_CACHE is not None:
+        stats_sitios = SITE_CACHE.estadisticas()
+        contadores.update({'sitios:hits': stats_sitios['hits'], 'sitios:misses': stats_sitios['misses']})
+    return contadores
+
+def _con_prefijo(contadores, prefijo) -> dict:
+    """Subconjunto de `contadores` con claves `prefijo:x`, indexado por x."""
+    return {clave.split(':', 1)[1]: n for clave, n in contadores.items() if clave.startswith(prefijo + ':')}
+
+def _get_cola():
+    """Devuelve la cola de trabajo compartida, abriéndola la primera vez."""
+    global COLA
+    if COLA is None:
+        COLA = WorkQueue()
+        COLA.abrir()
+    return COLA
+
+def _lanzar_trabajadores():
+    """Arranca (o repone, si alguno murió) los trabajadores locales de la cola."""
+    vivos = [p for p in TRABAJADORES if p.poll() is None]
+    script = os.path.join(BASE_DIR, "scripts", "worker_cola.py")
+    for _ in range(TRABAJADORES_LOCALES - len(vivos)):
+        vivos.append(subprocess.Popen([sys.executable, script, "--cola", str(COLA.ruta),
+                                       "--reparto", str(TRABAJADORES_LOCALES)]))
+    TRABAJADORES[:] = vivos
+
+def _procesar_con_cola(items, al_terminar):
+    """
+    Reparte los items por la cola en lotes y espera sus resultados.
+    - items: iterable (puede ser un generador) de (trabajo, grupo); grupo es [(fila, row), ...].
+    - al_terminar: función (item, resultado) llamada con cada resultado recogido.
+    Solo se leen más items cuando quedan menos de MAX_LOTES_EN_COLA lotes sin recoger.
+    Los trabajadores (procesos de este mismo host) devuelven [índice, resultado];
+    los lotes que agotan sus reintentos se registran como filas vacías. Los contadores
+    que envían con cada lote se suman en CONTADORES_COLA para el resumen final.
+    """
+    cola = _get_cola()
+    cola.purgar(CLAVE_COLA)   # Restos de una ejecución interrumpida: esas filas se repiten
+    items = iter(items)
+    en_vuelo = {}             # índice -> item, solo de los lotes sin recoger
+    contador = itertools.count()
+    agotado = False
+    lotes = 0
+    while True:
+        while not agotado and cola.pendientes(CLAVE_COLA) < MAX_LOTES_EN_COLA:
+            lote = []
+            for item in itertools.islice(items, TAMANO_LOTE):
+                idx = next(contador)
+                en_vuelo[idx] = item
+                lote.append([idx, item[1][0][1]])
+            if not lote:
+                agotado = True
+                break
+            lotes += cola.encolar(CLAVE_COLA, lote, TAMANO_LOTE)
+        for idx, resultado in cola.recoger(CLAVE_COLA):
+            al_terminar(en_vuelo.pop(idx), resultado)
+        for idx, row in cola.fallidos(CLAVE_COLA):
+            al_terminar(en_vuelo.pop(idx), _fila_vacia(row))
+        if agotado and not cola.pendientes(CLAVE_COLA):
+            break
+        _lanzar_trabajadores()
+        time.sleep(1)
+    CONTADORES_COLA.update(cola.contadores(CLAVE_COLA))
+    print(f"📬 {next(contador)} webs repartidas en {lotes} lotes")
+
+def _cerrar_cola():
+    """Avisa a los trabajadores de que no habrá más lotes y espera a que terminen."""
+    if COLA is None:
         return
-    df.drop(columns=[c for c in COLUMNAS_A_ELIMINAR if c in df.columns], inplace=True)
+    COLA.cerrar_cola()
+    for proceso in TRABAJADORES:
+        proceso.wait()
+    print(f"📬 Cola de trabajo: {COLA.estadisticas()}")
+    COLA.cerrar()
+
+def _map_acotado(executor, funcion, items, limite):
+    """
+    Como `executor.map`, pero consumiendo `items` de forma perezosa:
+    como mucho `limite` tareas en vuelo, sin materializar la entrada.
+    """
+    cupos = threading.BoundedSemaphore(limite)
+    futuros = deque()
+    for item in items:
+        cupos.acquire()
+        futuro = executor.submit(funcion, item)
+        futuro.add_done_callback(lambda _: cupos.release())
+        futuros.append(futuro)
+        while futuros and futuros[0].done():
+            futuros.popleft().result()
+    for futuro in futuros:
+        futuro.result()
+
+def _leer_bloques(path_in):
+    """
+    Lee el CSV por bloques de TAMANO_BLOQUE filas (en modo prueba, solo las 20 primeras),
+    aplicando la proyección y los renombrados del plan de columnas en la propia lectura.
+    """
+    cabecera = leer_cabecera(path_in)
+    columnas = PLAN_COLUMNAS.proyeccion(cabecera)
+    renombres = PLAN_COLUMNAS.renombres(columnas)
     if modo_prueba:
-        df = df.head(20)
+        bloques = [pd.read_csv(path_in, usecols=columnas, nrows=20)]
+    else:
+        bloques = pd.read_csv(path_in, usecols=columnas, chunksize=TAMANO_BLOQUE)
+    for df in bloques:
+        yield df[columnas].rename(columns=renombres) if renombres else df[columnas]
+
+class _TrabajoArchivo:
+    """
+    Seguimiento de un fichero en la etapa de scraping: registra sus resultados en el diario
+    y avisa con `al_completar(nombre)` cuando se ha leído entero y no le quedan webs en vuelo.
+    """
+
+    def __init__(self, nombre_archivo, al_completar):
+        self.nombre = nombre_archivo
+        self.path_in = os.path.join(CLEAN_INPUT_FOLDER, nombre_archivo)
+        self.al_completar = al_completar
+        self.journal = _get_journal()
+        self.resumen = Counter()
+        self.descartes = Counter()     # Filas descartadas por el preflight, por motivo
+        self._en_vuelo = 0
+        self._leido = False
+        self._fallido = False
+        self._lock = threading.Lock()
+
+    def registrar(self, fila, resultado):
+        self.journal.registrar(self.nombre, fila, resultado)
+
+    def registrar_grupo(self, grupo, resultado):
+        # Reparte el resultado del representante a todas las filas del grupo
+        for fila, row in grupo:
+            self.registrar(fila, {**row, **{c: resultado.get(c, '') for c in COLUMNAS_RESULTADO}})
+
+    def terminar_grupo(self, grupo, resultado):
+        """Registra el resultado de un grupo enviado a scrapear y comprueba si el fichero terminó."""
+        self.registrar_grupo(grupo, resultado)
+        with self._lock:
+            self._en_vuelo -= 1
+            completo = self._leido and self._en_vuelo == 0
+        if completo:
+            self._completar()
+
+    def grupos(self):
+        """
+        Lee el CSV por bloques y genera los items (trabajo, grupo) de filas que comparten web
+        y quedan por scrapear. La memoria depende del tamaño de bloque, no del fichero.
+        Si el fichero no se puede leer, se omite sin detener el resto de la ejecución.
+        """
+        try:
+            yield from self._leer_grupos()
+        except Exception as e:
+            self._fallido = True
+            logging.error(f"Error leyendo {self.nombre}: {e}")
+            print(f"❌ Error leyendo {self.nombre}: {e}")
+
+        with self._lock:
+            self._leido = True
+            completo = self._en_vuelo == 0
+        if completo:
+            self._completar()
+
+    def _leer_grupos(self):
+        hechas = self.journal.filas_hechas(self.nombre)
+        if hechas:
+            print(f"⏩ Reanudando {self.nombre}: {len(hechas)} filas ya hechas")
+        inicio = 0
+        for df in _leer_bloques(self.path_in):
+            registros = df.to_dict(orient='records')
+            pendientes = [
+                (inicio + i, row) for i, row in enumerate(registros)
+                if inicio + i not in hechas
+            ]
+            inicio += len(registros)
+            self.resumen['filas'] += len(pendientes)
+
+            # Consultar la caché de sitios antes de cualquier trabajo de red o navegador
+            por_scrapear = []
+            for fila, row in pendientes:
+                cacheado = _fila_desde_cache(row)
+                if cacheado is not None:
+                    self.registrar(fila, cacheado)
+                else:
+                    por_scrapear.append((fila, row))
+            self.resumen['cacheadas'] += len(pendientes) - len(por_scrapear)
+
+            # Agrupar las filas que comparten web (sucursales): cada URL se carga una sola vez
+            grupos = {}
+            for fila, row in por_scrapear:
+                clave = _clave_sitio(row) or ('fila', fila)
+                grupos.setdefault(clave, []).append((fila, row))
+            # Intercalar hosts: filas consecutivas apuntan a servidores distintos
+            claves = intercalar(grupos, lambda clave: normalizar_host(str(grupos[clave][0][1].get('website', ''))))
+            self.resumen['ahorradas'] += len(por_scrapear) - len(claves)
+
+            # Comprobación previa DNS/TCP: los sitios caídos no llegan ni a HTTP ni al navegador
+            if PREFLIGHT_ACTIVO:
+                urls = {clave: grupos[clave][0][1]['website'].strip() for clave in claves if isinstance(clave, str)}
+                caidas = comprobar_alcance(urls.values())
+                for clave, url in urls.items():
+                    motivo = caidas.get(url)
+                    if motivo:
+                        # El motivo queda en el log junto a cada fila (índice del diario), para
+                        # distinguirlas de las scrapeadas sin resultados
+                        filas = [fila for fila, _ in grupos[clave]]
+                        logging.info(f"Preflight: {self.nombre} filas {filas}: {url} inalcanzable ({motivo})")
+                        self.descartes[motivo] += len(filas)
+                        self.registrar_grupo(grupos[clave], _fila_vacia(grupos[clave][0][1]))
+                claves = [clave for clave in claves if urls.get(clave) not in caidas]
+                self.resumen['caidas'] += len(caidas)
+
+            for clave in claves:
+                with self._lock:
+                    self._en_vuelo += 1
+                yield self, grupos[clave]
+
+    def _completar(self):
+        global CARGAS_AHORRADAS
+        if self._fallido:
+            # Sin Excel parcial: las filas ya hechas quedan en el diario para reanudar
+            print(f"⚠️ {self.nombre} omitido por errores de lectura (sin Excel)")
+            return
+        resumen = self.resumen
+        print(f"✔️ Scraping terminado: {self.nombre}")
+        if resumen['cacheadas']:
+            print(f"💾 {resumen['cacheadas']} filas resueltas desde la caché de sitios")
+        if resumen['ahorradas']:
+            CARGAS_AHORRADAS += resumen['ahorradas']
+            print(f"🔗 {resumen['filas'] - resumen['cacheadas']} filas → "
+                  f"{resumen['filas'] - resumen['cacheadas'] - resumen['ahorradas']} webs únicas "
+                  f"({resumen['ahorradas']} cargas ahorradas)")
+        if resumen['caidas']:
+            detalle = ', '.join(f"{motivo}: {n}" for motivo, n in sorted(self.descartes.items()))
+            print(f"🛰️ {resumen['caidas']} webs inalcanzables descartadas antes de scrapear "
+                  f"({sum(self.descartes.values())} filas; {detalle}; detalle por fila en el log)")
+        self.al_completar(self.nombre)
+
+def _trabajos(nombres, al_completar):
+    """Genera un _TrabajoArchivo por cada fichero pendiente (sin Excel de salida y con columna 'website')."""
+    for nombre_archivo in nombres:
+        path_in  = os.path.join(CLEAN_INPUT_FOLDER, nombre_archivo)
+        path_out = os.path.join(OUTPUT_FOLDER, f"{nombre_archivo.replace('.csv', '')}.xlsx")
+        if os.path.exists(path_out) or os.path.getsize(path_in) == 0:
+            continue
+        try:
+            if 'website' not in leer_cabecera(path_in):
+                continue
+        except (OSError, UnicodeDecodeError) as e:
+            logging.error(f"Error leyendo {nombre_archivo}: {e}")
+            print(f"❌ Error leyendo {nombre_archivo}: {e}")
+            continue
+        print(f"\n▶️ Procesando: {nombre_archivo}")
+        yield _TrabajoArchivo(nombre_archivo, al_completar)
+
+def scrapear_archivos(trabajos):
+    """
+    Etapa de scraping: consume los ficheros de `trabajos` como un único flujo de webs,
+    de modo que el pool no se vacía entre un fichero y el siguiente.
+    Cada fichero avisa por su `al_completar` en cuanto terminan todas sus filas.
+    """
+    items = itertools.chain.from_iterable(trabajo.grupos() for trabajo in trabajos)
+
+    def _terminar(item, resultado):
+        trabajo, grupo = item
+        trabajo.terminar_grupo(grupo, resultado)
+
+    if MOTOR_SCRAPING == "cola":
+        _procesar_con_cola(items, al_terminar=_terminar)
+        return
 
-    rows = df.to_dict(orient='records')
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS, initializer=_init_thread_driver) as executor:
-        resultados = list(executor.map(procesar_sitio, rows))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        if MOTOR_SCRAPING == "asyncio":
+            from extractor.async_crawler import ejecutar_crawl_async
+            en_vuelo = {}
+
+            def _filas():
+                for idx, item in enumerate(items):
+                    en_vuelo[idx] = item
+                    yield item[1][0][1]
+
+            ejecutar_crawl_async(
+                _filas(),
+                procesar=_procesar_con_snapshot,
+                fallback_navegador=_fetch_con_navegador,
+                navegador_executor=executor,
+                al_terminar=lambda idx, resultado: _terminar(en_vuelo.pop(idx), resultado),
+            )
+        else:
+            def _procesar_y_registrar(item):
+                _terminar(item, procesar_sitio(item[1][0][1]))
+            _map_acotado(executor, _procesar_y_registrar, items, limite=MAX_WORKERS * 4)
+
+def escribir_excel(nombre_archivo):
+    """Etapa de salida: construye el Excel por bloques desde el diario y lo limpia."""
+    journal = _get_journal()
+
+    # Construir el Excel por bloques desde el diario, aplicando el orden de salida del plan
+    def _bloques_resultado():
+        resultados = journal.resultados(nombre_archivo)
+        while True:
+            bloque = list(itertools.islice(resultados, TAMANO_BLOQUE))
+            if not bloque:
+                return
+            yield PLAN_COLUMNAS.ordenar(pd.DataFrame(bloque))
+
+    generar_excel_por_bloques(_bloques_resultado(), nombre_archivo)
+    journal.borrar(nombre_archivo)
 
-    # Cerrar todos los drivers creados
-    for drv in DRIVERS:
-        drv.quit()
+def procesar_archivo(nombre_archivo):
+    """Procesa un único fichero de principio a fin: scraping y Excel."""
+    terminados = []
+    scrapear_archivos(_trabajos([nombre_archivo], terminados.append))
+    for nombre in terminados:
+        escribir_excel(nombre)
+
+# ---------------- Pipeline por etapas ----------------
+def _etapa_preparacion(salida: queue.Queue, errores: list, parar: threading.Event):
+    """
+    Etapa 1: limpieza, con el plan de columnas aplicado en la misma lectura. Entrega cada fichero listo en `salida`
+    y termina con el centinela None (también si falla). Deja de preparar ficheros si se activa `parar`.
+    """
+    try:
+        os.makedirs(CLEAN_INPUT_FOLDER, exist_ok=True)
+        entregados = set()
 
-    # Construir DataFrame final y aplicar renombrado/reindexado
-    df_res = pd.DataFrame(resultados)
-    if RENOMBRAR_COLUMNAS:
-        df_res.rename(columns=RENOMBRAR_COLUMNAS, inplace=True)
+        def _entregar(nombre):
+            entregados.add(nombre)
+            salida.put(nombre)
 
-    if NUEVO_ORDEN:
-        cols_validas = [c for c in NUEVO_ORDEN if c in df_res.columns]
-        if cols_validas:
-            df_res = df_res.reindex(columns=cols_validas)
+        # 1) Limpieza en proceso (proyección + renombrado del plan), en un pool de procesos: cada fichero
+        #    pasa a scraping en cuanto termina, sin esperar al resto
+        print(f"📂 Ejecutando limpieza...")
+        archivos = sorted(glob.glob(os.path.join(INPUT_FOLDER, "*.csv")))
+        for origen, limpio in limpiar_lote(archivos, CLEAN_INPUT_FOLDER):
+            if parar.is_set():
+                return
+            if limpio is None:
+                continue
+            # 2) Eliminar el CSV original ya limpiado
+            os.remove(origen)
+            _entregar(os.path.basename(limpio))
+        if archivos:
+            print("🗑️ Archivos originales eliminados de 'data/inputs'.")
+
+        # 3) Ficheros ya limpios que quedaron de ejecuciones anteriores
+        for nombre in sorted(os.listdir(CLEAN_INPUT_FOLDER)):
+            if parar.is_set():
+                return
+            if nombre.lower().endswith('.csv') and nombre not in entregados:
+                _entregar(nombre)
+    except BaseException as e:
+        errores.append(e)
+    finally:
+        salida.put(None)
+
+def _etapa_excel(entrada: queue.Queue, errores: list):
+    """Etapa 3: genera el Excel de cada fichero terminado mientras se scrapea el siguiente."""
+    while True:
+        nombre = entrada.get()
+        if nombre is None:
+            return
+        try:
+            escribir_excel(nombre)
+        except Exception as e:
+            logging.error(f"Error generando el Excel de {nombre}: {e}")
+            errores.append((nombre, e))
+
+def ejecutar_pipeline():
+    """
+    Limpieza, scraping y generación de Excel en etapas solapadas, unidas por colas acotadas:
+    mientras se scrapea un fichero, el siguiente se prepara y el anterior se escribe.
+    """
+    preparados = queue.Queue(maxsize=COLA_ETAPAS)
+    terminados = queue.Queue(maxsize=COLA_ETAPAS)
+    errores_preparacion, errores_excel = [], []
+    parar_preparacion = threading.Event()
+
+    preparacion = threading.Thread(
+        target=_etapa_preparacion, args=(preparados, errores_preparacion, parar_preparacion),
+        name="preparacion", daemon=True
+    )
+    escritura = threading.Thread(
+        target=_etapa_excel, args=(terminados, errores_excel), name="excel", daemon=True
+    )
+    preparacion.start()
+    escritura.start()
+
+    preparacion_agotada = threading.Event()
 
-    generar_excel(df_res, nombre_archivo)
+    def _preparados():
+        while True:
+            nombre = preparados.get()
+            if nombre is None:
+                preparacion_agotada.set()
+                return
+            yield nombre
+
+    try:
+        scrapear_archivos(_trabajos(_preparados(), terminados.put))
+    finally:
+        terminados.put(None)
+        # Si el scraping se cortó antes de tiempo, la preparación puede estar bloqueada en
+        # put() con la cola llena: pedirle que pare y vaciar la cola hasta su centinela
+        if not preparacion_agotada.is_set():
+            parar_preparacion.set()
+            while preparados.get() is not None:
+                pass
+        escritura.join()
+        preparacion.join()
+
+    for error in errores_preparacion:
+        if isinstance(error, SystemExit):
+            sys.exit(error.code)
+        raise error
+    if errores_excel:
+        for nombre, error in errores_excel:
+            print(f"❌ Error generando el Excel de {nombre}: {error}")
+        raise errores_excel[0][1]
 
 # ---------------- Script principal ----------------
 if __name__ == '__main__':
@@ -182,36 +668,85 @@ if __name__ == '__main__':
     if input('Elige (1 o 2): ').strip() == '1':
         modo_prueba = True
 
-    # 1) Ejecutar limpieza
-    ejecutar_script_limpieza()
-
-    # 2) Eliminar los CSVs originales que ya fueron limpiados
-    for fname in os.listdir(CLEAN_INPUT_FOLDER):
-        if fname.lower().endswith('.csv'):
-            orig = os.path.join(INPUT_FOLDER, fname)
-            if os.path.exists(orig):
-                os.remove(orig)
-    print("🗑️ Archivos originales eliminados de 'data/inputs'.")
-
-    # 3) Procesar clean_inputs
-    if not os.path.isdir(CLEAN_INPUT_FOLDER):
-        print(f"❌ No existe clean_inputs.")
-        sys.exit(1)
-
-    procesar_csvs_en_carpeta(
-        carpeta_outputs=CLEAN_INPUT_FOLDER,
-        nuevo_orden=None,
-        renombrar_columnas=None
-    )
+    print('1 - Motor por hilos (Selenium)\n2 - Motor asyncio (alta concurrencia)\n'
+          '3 - Cola de trabajo (procesos trabajadores en este equipo)')
+    motor = input('Elige motor (1, 2 o 3): ').strip()
+    if motor == '2':
+        MOTOR_SCRAPING = "asyncio"
+    elif motor == '3':
+        MOTOR_SCRAPING = "cola"
 
-    archivos = [f for f in os.listdir(CLEAN_INPUT_FOLDER) if f.lower().endswith('.csv')]
-    for nombre in archivos:
-        try:
-            print(f"\n▶️ Procesando: {nombre}")
-            procesar_archivo(nombre)
-        except KeyboardInterrupt:
-            print('✋ Proceso cancelado por el usuario.')
-            sys.exit(0)
+    if DNS_CACHE_PERSISTENTE:
+        DNS_CACHE.activar_persistencia()
+
+    try:
+        ejecutar_pipeline()
+    except KeyboardInterrupt:
+        print('✋ Proceso cancelado por el usuario.')
+        _cerrar_cola()
+        _cerrar_browser_pool()
+        if DNS_CACHE_PERSISTENTE:
+            DNS_CACHE.guardar()
+        sys.exit(0)
+
+    _cerrar_cola()
+    _cerrar_browser_pool()
+    # En modo cola el scraping ocurre en los trabajadores: sus contadores llegan en CONTADORES_COLA
+    en_cola = MOTOR_SCRAPING == "cola"
+    contadores = contadores_proceso() + CONTADORES_COLA
+    if SITE_CACHE is not None or en_cola:
+        aciertos, fallos = contadores['sitios:hits'], contadores['sitios:misses']
+        print(f"💾 Caché de sitios ({CACHE_SITIOS_MODO}): {aciertos} aciertos, "
+              f"{fallos} fallos ({aciertos / max(aciertos + fallos, 1):.0%})")
+    if SITE_CACHE is not None:
+        SITE_CACHE.cerrar()
+    if BROWSER_POOL is not None:
+        print(f"🧭 Navegadores: {BROWSER_POOL.stats}")
+
+    if DNS_CACHE_PERSISTENTE:
+        DNS_CACHE.guardar()   # Fusiona lo que guardaron los trabajadores
+    print(f"🧠 Caché DNS: {contadores['dns:hits']} aciertos, {contadores['dns:misses']} consultas reales, "
+          f"{DNS_CACHE.estadisticas()['entradas']} entradas")
+
+    if EMAIL_VERIFICATION_MODE == 'ultra-avanzado':
+        # Cada trabajador tiene su propia memoria de sondas: un host puede contarse una vez por trabajador
+        print(f"📮 Servidores SMTP sondeados: {contadores['smtp:hosts']} ({contadores['smtp:activos']} activos)"
+              + (" (suma de los trabajadores)" if en_cola else ""))
+
+    descartes = _con_prefijo(contadores, 'prefiltro')
+    if descartes:
+        detalle = ', '.join(f"{regla}: {n}" for regla, n in sorted(descartes.items()))
+        print(f"🧹 Candidatos a email descartados antes de verificar → {detalle}")
+        logging.info(f"Prefiltro de emails: {descartes}")
+
+    caminos = _con_prefijo(contadores, 'fetch')
+    print(f"📡 Sitios por HTTP: {caminos.get('http', 0)} | "
+          f"por Selenium: {caminos.get('selenium', 0)} | con error: {caminos.get('error', 0)}")
+    if en_cola:
+        # Las latencias y los timeouts vigentes son de cada trabajador; solo se suman los agotados
+        for etapa, n in sorted(_con_prefijo(contadores, 'agotados').items()):
+            print(f"⏱️ Timeout {etapa}: {n} filas lo agotaron (en los trabajadores)")
+    else:
+        for etapa, datos in TIMEOUTS.resumen().items():
+            if datos['muestras'] or datos['agotados']:
+                print(f"⏱️ Timeout {etapa}: {datos['timeout']:.1f}s (p50 {datos['p50']:.1f}s, p95 {datos['p95']:.1f}s, "
+                      f"{datos['muestras']} muestras) → {datos['agotados']} filas lo agotaron")
+        logging.info(f"Timeouts adaptativos: {TIMEOUTS.resumen()}")
+
+    preflight = resumen_preflight()
+    if preflight:
+        motivos = ', '.join(f"{m}: {n}" for m, n in sorted(preflight.items()) if m != 'comprobados')
+        print(f"🛰️ Preflight: {preflight.get('comprobados', 0)} hosts comprobados"
+              + (f" → descartados {motivos}" if motivos else ""))
+
+    stats_hosts = _con_prefijo(contadores, 'hosts')
+    if stats_hosts.get('pausas') or stats_hosts.get('esperas_cupo'):
+        print(f"🚦 Cortesía por host: {stats_hosts.get('pausas', 0)} pausas por 429/5xx "
+              f"({stats_hosts.get('segundos_pausa', 0):.0f}s), {stats_hosts.get('esperas_cupo', 0)} esperas de cupo"
+              + (f" (límites repartidos entre {TRABAJADORES_LOCALES} trabajadores)" if en_cola else ""))
+    if CARGAS_AHORRADAS:
+        print(f"🔗 Cargas de página ahorradas por webs repetidas: {CARGAS_AHORRADAS}")
+    logging.info(f"Caminos de carga: {caminos}")
 
     duracion = time.time() - inicio
     logging.info(f"✅ Completado en {duracion:.2f}s.")
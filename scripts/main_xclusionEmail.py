@@ -1,12 +1,20 @@
-import os
+import sys, os
+# Asegura que Python encuentre el paquete extractor
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import hashlib
+import json
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-import matplotlib.pyplot as plt
-from openpyxl import load_workbook
-from openpyxl.drawing.image import Image as OpenpyxlImage
-from PIL import Image as PILImage
-from pandas.plotting import table
+import xlsxwriter
 from pathlib import Path
 
+from extractor.exclusion_matcher import ExclusionMatcher
+from extractor.generador_excel import MAX_FILAS_HOJA
+
 # 📂 Base del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -16,34 +24,44 @@ OUTPUT_FOLDER      = BASE_DIR / "data" / "xclusion" / "xclusiones_outputs"
 EXCLUSIONES_FOLDER = BASE_DIR / "config" / "txt_config" / "xclusiones_email"
 HOJA_DATA = "data"
 HOJA_STATS = "statistics"
+# generador_excel reparte los datos en data, data_2, data_3... al superar el límite de filas de Excel
+RE_HOJA_DATA = re.compile(rf"^{HOJA_DATA}(?:_(\d+))?$")
 IMAGE_SIZE = (1200, 630)
 
+# Renderizado de imágenes en procesos aparte (matplotlib es lento y no es thread-safe)
+MAX_PROCESOS       = min(4, os.cpu_count() or 1)
+RUTA_CACHE_IMAGENES = BASE_DIR / "data" / "cache" / "imagenes.json"
+VERSION_IMAGENES   = 1      # Subirla al cambiar el aspecto de las imágenes invalida la caché
 
-def cargar_exclusiones(carpeta):
-    exclusiones = set()
-    for fn in os.listdir(carpeta):
-        if fn.endswith(".txt"):
-            with open(os.path.join(carpeta, fn), encoding="utf-8") as f:
-                exclusiones.update(line.strip().lower() for line in f if line.strip())
-    return exclusiones
+# Motor de lectura rápido si está disponible (python-calamine es opcional)
+try:
+    import python_calamine  # noqa: F401
+    MOTOR_EXCEL = "calamine"
+except ImportError:
+    MOTOR_EXCEL = "openpyxl"
 
 
-def filtrar_y_contar(df: pd.DataFrame, exclusiones: set):
-    orig_listas = df["email"].fillna("").apply(
-        lambda cell: [e.strip() for e in str(cell).replace(';', ',').split(',') if e.strip()]
-    )
-    orig_counts = orig_listas.apply(len)
+def filtrar_y_contar(df: pd.DataFrame, matcher: ExclusionMatcher):
+    # Una fila por email (índice = posición de la fila), para filtrar todos de una vez
+    celdas = df["email"].fillna("").astype(str).str.replace(";", ",", regex=False).str.split(",")
+    celdas.index = range(len(df))
+    emails = celdas.explode().str.strip()
+    emails = emails[emails != ""]
 
-    filt_listas = orig_listas.apply(
-        lambda lst: [e for e in lst if not any(tok in e.lower() for tok in exclusiones)]
-    )
-    filt_counts = filt_listas.apply(len)
+    conservados = emails[~matcher.mascara(emails)]
+
+    # Reagrupar por fila (un groupby por fila sería más lento que este recorrido lineal)
+    filt_listas = [[] for _ in range(len(df))]
+    for pos, email in zip(conservados.index, conservados.to_numpy()):
+        filt_listas[pos].append(email)
 
     df_filtrado = df.copy()
-    df_filtrado["email"] = filt_listas.apply(lambda lst: ", ".join(lst) if lst else pd.NA)
+    df_filtrado["email"] = pd.Series(
+        [", ".join(lst) if lst else pd.NA for lst in filt_listas], index=df.index
+    )
 
-    total_eliminadas = (orig_counts - filt_counts).sum()
-    total_restantes = filt_counts.explode().dropna().nunique()
+    total_eliminadas = len(emails) - len(conservados)
+    total_restantes = conservados.nunique()
     return df_filtrado, total_eliminadas, total_restantes
 
 
@@ -62,12 +80,21 @@ def generar_estadisticas(df_data, df_sectors):
     return pd.DataFrame([stats])
 
 
-def insertar_imagen_en_excel(path_excel, path_imagen, hoja=HOJA_STATS, cell='A10'):
-    wb = load_workbook(path_excel)
-    ws = wb[hoja]
-    img = OpenpyxlImage(path_imagen)
-    ws.add_image(img, cell)
-    wb.save(path_excel)
+def _pyplot():
+    """Importa matplotlib solo cuando hay algo que dibujar, con el backend no interactivo Agg."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def guardar_grafico_estadisticas(estadisticas, path_imagen):
+    plt = _pyplot()
+    estadisticas.T.plot(kind="bar", legend=False, figsize=(12, 6), title="Statistics Overview", color="#3498db")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    plt.savefig(path_imagen, dpi=100)
+    plt.close()
 
 
 def guardar_tabla_como_imagen(df, path_imagen, title=None, columns=None):
@@ -82,10 +109,14 @@ def guardar_tabla_como_imagen(df, path_imagen, title=None, columns=None):
     df = df.head(max_rows)
 
     # Usamos map en vez de applymap para compatibilidad con pandas 2.x
-    df = df.copy().astype(str).apply(
-        lambda col: col.map(lambda x: x[:max_chars] + "…" if len(x) > max_chars else x)
+    # map(str) y no astype(str): con pandas 3 los NaN sobreviven a astype(str)
+    df = df.copy().apply(
+        lambda col: col.map(str).map(lambda x: x[:max_chars] + "…" if len(x) > max_chars else x)
     )
 
+    plt = _pyplot()
+    from pandas.plotting import table
+
     fig, ax = plt.subplots(figsize=(IMAGE_SIZE[0] / 100, IMAGE_SIZE[1] / 100))
     ax.axis("off")
 
@@ -140,19 +171,42 @@ def guardar_tabla_como_imagen(df, path_imagen, title=None, columns=None):
     plt.close(fig)
 
 
-def procesar_archivo(path_entrada: str, exclusiones: set):
-    hojas = pd.read_excel(path_entrada, sheet_name=None)
+def leer_hojas(path_entrada: str) -> dict:
+    """Lee todas las hojas salvo la de estadísticas, que se regenera."""
+    with pd.ExcelFile(path_entrada, engine=MOTOR_EXCEL) as libro:
+        return {
+            nombre: libro.parse(nombre)
+            for nombre in libro.sheet_names
+            if nombre != HOJA_STATS
+        }
+
+
+def _hojas_de_datos(hojas: dict) -> list:
+    """Nombres de las hojas de datos (`data`, `data_2`, ...) en su orden."""
+    numeradas = []
+    for nombre in hojas:
+        m = RE_HOJA_DATA.match(nombre)
+        if m:
+            numeradas.append((int(m.group(1) or 1), nombre))
+    return [nombre for _, nombre in sorted(numeradas)]
+
+
+def procesar_archivo(path_entrada: str, matcher: ExclusionMatcher):
+    hojas = leer_hojas(path_entrada)
     if HOJA_DATA not in hojas:
         raise RuntimeError(f"No existe la hoja '{HOJA_DATA}' en {path_entrada}")
 
-    df_data = hojas[HOJA_DATA]
-    df_limpia, tot_elim, tot_rest = filtrar_y_contar(df_data, exclusiones)
+    # Todas las hojas de datos se filtran y cuentan como una sola tabla
+    nombres_datos = _hojas_de_datos(hojas)
+    df_data = pd.concat([hojas[n] for n in nombres_datos], ignore_index=True) if len(nombres_datos) > 1 \
+        else hojas[HOJA_DATA]
+    df_limpia, tot_elim, tot_rest = filtrar_y_contar(df_data, matcher)
 
     hojas_out = {}
     hojas_out[HOJA_DATA] = df_limpia
 
     for name, df in hojas.items():
-        if name not in (HOJA_DATA, HOJA_STATS):
+        if name not in nombres_datos and name != HOJA_STATS:
             hojas_out[name] = df.copy()
 
     df_stats = generar_estadisticas(df_limpia, hojas.get("sectors", pd.DataFrame(columns=["Sector"])))
@@ -161,83 +215,203 @@ def procesar_archivo(path_entrada: str, exclusiones: set):
     return hojas_out, df_stats
 
 
-def guardar_hojas(hojas_dict: dict, path_salida: str):
-    os.makedirs(os.path.dirname(path_salida), exist_ok=True)
-    with pd.ExcelWriter(path_salida, engine="openpyxl") as writer:
-        for nombre in (HOJA_DATA, HOJA_STATS):
-            if nombre in hojas_dict:
-                hojas_dict[nombre].to_excel(writer, sheet_name=nombre, index=False)
-        for nombre, df in hojas_dict.items():
-            if nombre not in (HOJA_DATA, HOJA_STATS):
-                df.to_excel(writer, sheet_name=nombre, index=False)
-
+def _valor_celda(valor):
+    """NaN/NaT a celda vacía (como `to_excel`); el resto, tal cual."""
+    return None if pd.isna(valor) else valor
 
-def main():
-    exclusiones = cargar_exclusiones(EXCLUSIONES_FOLDER)
-    print(f"📋 Cargadas {len(exclusiones)} palabras de exclusión\n")
-
-    for fn in os.listdir(CLEAN_INPUT_FOLDER):
-        if not fn.lower().endswith(".xlsx"):
-            continue
-        entrada = os.path.join(CLEAN_INPUT_FOLDER, fn)
-        salida = os.path.join(OUTPUT_FOLDER, fn)
-
-        print(f"🔄 Procesando: {fn}")
-        hojas_out, estadisticas = procesar_archivo(entrada, exclusiones)
-
-        # 📊 Ordenar data por reviews
-        df_data = hojas_out[HOJA_DATA]
-        if "reviews" in df_data.columns:
-            df_data["reviews"] = pd.to_numeric(df_data["reviews"], errors="coerce")
-            df_data = df_data.sort_values("reviews", ascending=False)
-            hojas_out[HOJA_DATA] = df_data
-
-        guardar_hojas(hojas_out, salida)
-
-        # 📊 Imagen gráfica de estadísticas
-        graph_path = os.path.join(OUTPUT_FOLDER, fn.replace(".xlsx", "_stats.jpg"))
-        estadisticas.T.plot(kind="bar", legend=False, figsize=(12, 6), title="Statistics Overview", color="#3498db")
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
-        plt.savefig(graph_path, dpi=100)
-        plt.close()
-        insertar_imagen_en_excel(salida, graph_path)
 
+def guardar_hojas(hojas_dict: dict, path_salida: str, imagen_stats: str = None):
+    """
+    Escribe el libro final en una sola pasada (xlsxwriter en modo de memoria constante):
+    `data` y `statistics` primero, luego el resto de hojas, con la imagen de
+    estadísticas ya incrustada en `statistics` si se indica. Si `data` supera el límite
+    de filas de Excel continúa en `data_2`, `data_3`... como generador_excel.
+    """
+    os.makedirs(os.path.dirname(path_salida), exist_ok=True)
+    workbook = xlsxwriter.Workbook(
+        path_salida,
+        {"constant_memory": True, "strings_to_urls": False, "default_date_format": "yyyy-mm-dd hh:mm:ss"},
+    )
+    formato_cabecera = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+
+    nombres = [n for n in (HOJA_DATA, HOJA_STATS) if n in hojas_dict]
+    nombres += [n for n in hojas_dict if n not in (HOJA_DATA, HOJA_STATS)]
+    for nombre in nombres:
+        df = hojas_dict[nombre]
+        partes = [df]
+        if nombre == HOJA_DATA and len(df) > MAX_FILAS_HOJA:
+            partes = [df.iloc[i:i + MAX_FILAS_HOJA] for i in range(0, len(df), MAX_FILAS_HOJA)]
+        for n, parte in enumerate(partes, start=1):
+            worksheet = workbook.add_worksheet(nombre if n == 1 else f"{nombre}_{n}")
+            worksheet.write_row(0, 0, [str(c) for c in parte.columns], formato_cabecera)
+            for r, fila in enumerate(parte.astype(object).itertuples(index=False, name=None), start=1):
+                worksheet.write_row(r, 0, [_valor_celda(v) for v in fila])
+        if nombre == HOJA_STATS and imagen_stats:
+            worksheet.insert_image("A10", imagen_stats)
+    workbook.close()
+
+
+def _tabla_sectores(df_sectors):
+    """Sector + número de empresas, ordenado, para la imagen de sectores (None si no aplica)."""
+    # ➊ Columnas que incluyan 'sector'
+    sector_cols = [col for col in df_sectors.columns if "sector" in col.lower()]
+    # ➋ Columnas que incluyan 'number' o 'count'
+    company_cols = [col for col in df_sectors.columns if any(tok in col.lower() for tok in ("number", "count"))]
+
+    # ➌ Fallback si solo hay dos columnas
+    if not sector_cols and len(df_sectors.columns) == 2:
+        sector_cols = [df_sectors.columns[0]]
+        company_cols = [df_sectors.columns[1]]
+
+    if not (sector_cols and company_cols):
+        print("⚠️ No se encontraron columnas adecuadas en la hoja 'sectors'")
+        return None
+    df_sector_imagen = df_sectors[[sector_cols[0], company_cols[0]]].copy()
+    df_sector_imagen.columns = ["Sector", "Number of companies"]
+    return df_sector_imagen.sort_values("Number of companies", ascending=False)
+
+
+def imagenes_de_archivo(fn, hojas_out, estadisticas) -> list:
+    """Imágenes de un libro como trabajos (tipo, datos, ruta, título); la de estadísticas va primero."""
+    base = os.path.join(OUTPUT_FOLDER, fn.replace(".xlsx", ""))
+    trabajos = [
+        ("grafico", estadisticas, f"{base}_stats.jpg", None),
         # 📸 Tabla data (primeros 20)
-        guardar_tabla_como_imagen(
-            df_data.head(20),
-            os.path.join(OUTPUT_FOLDER, fn.replace(".xlsx", "_data.jpg")),
-            title="Data"
-        )
-
-        # 📸 Sector (sector + número de empresas ordenado)
-        df_sectors = hojas_out.get("sectors")
-        if df_sectors is not None:
-            # ➊ Columnas que incluyan 'sector'
-            sector_cols = [col for col in df_sectors.columns if "sector" in col.lower()]
-            # ➋ Columnas que incluyan 'number' o 'count'
-            company_cols = [col for col in df_sectors.columns if any(tok in col.lower() for tok in ("number", "count"))]
-
-            # ➌ Fallback si solo hay dos columnas
-            if not sector_cols and len(df_sectors.columns) == 2:
-                sector_cols = [df_sectors.columns[0]]
-                company_cols = [df_sectors.columns[1]]
-
-            if sector_cols and company_cols:
-                df_sector_imagen = df_sectors[[sector_cols[0], company_cols[0]]].copy()
-                df_sector_imagen.columns = ["Sector", "Number of companies"]
-                df_sector_imagen = df_sector_imagen.sort_values("Number of companies", ascending=False)
-                guardar_tabla_como_imagen(
-                    df_sector_imagen,
-                    os.path.join(OUTPUT_FOLDER, fn.replace(".xlsx", "_sectors.jpg")),
-                    title="Sectors"
-                )
-            else:
-                print("⚠️ No se encontraron columnas adecuadas en la hoja 'sectors'")
-        else:
-            print("⚠️ Hoja 'sectors' no encontrada")
+        ("tabla", hojas_out[HOJA_DATA].head(20), f"{base}_data.jpg", "Data"),
+    ]
+    # 📸 Sector (sector + número de empresas ordenado)
+    df_sectors = hojas_out.get("sectors")
+    if df_sectors is None:
+        print("⚠️ Hoja 'sectors' no encontrada")
+    else:
+        df_sector_imagen = _tabla_sectores(df_sectors)
+        if df_sector_imagen is not None:
+            trabajos.append(("tabla", df_sector_imagen, f"{base}_sectors.jpg", "Sectors"))
+    return trabajos
+
+
+def renderizar_imagen(trabajo) -> str:
+    """Dibuja un trabajo de imagen (se ejecuta en el pool de procesos). Retorna la ruta."""
+    tipo, datos, ruta, titulo = trabajo
+    if tipo == "grafico":
+        guardar_grafico_estadisticas(datos, ruta)
+    else:
+        guardar_tabla_como_imagen(datos, ruta, title=titulo)
+    return ruta
+
+
+def _huella(trabajo) -> str:
+    """Huella de lo que se dibuja: si no cambia y la imagen existe, no hace falta repetirla."""
+    tipo, datos, _, titulo = trabajo
+    contenido = json.dumps([VERSION_IMAGENES, tipo, titulo, datos.to_csv(index=False)], ensure_ascii=False)
+    return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+
+class RenderizadorImagenes:
+    """
+    Etapa de imágenes: reparte los trabajos en un pool de procesos (creado solo si hace falta)
+    y omite los que coinciden con la caché de huellas en RUTA_CACHE_IMAGENES.
+    """
+
+    def __init__(self, max_procesos: int = MAX_PROCESOS, ruta_cache: Path = RUTA_CACHE_IMAGENES):
+        self.max_procesos = max_procesos
+        self.ruta_cache = Path(ruta_cache)
+        self._pool = None
+        self.omitidas = 0
+        try:
+            with open(self.ruta_cache, 'r', encoding='utf-8') as f:
+                self._huellas = json.load(f)
+        except (OSError, ValueError):
+            self._huellas = {}
+
+    def encargar(self, trabajo):
+        """Lanza el trabajo; retorna un futuro, o None si la imagen vigente ya existe."""
+        ruta = trabajo[2]
+        huella = _huella(trabajo)
+        if self._huellas.get(ruta) == huella and os.path.exists(ruta):
+            self.omitidas += 1
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_procesos)
+        futuro = self._pool.submit(renderizar_imagen, trabajo)
+
+        def _al_terminar(f):
+            if f.exception() is None:
+                self._huellas[ruta] = huella
+        futuro.add_done_callback(_al_terminar)
+        return futuro
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+        self.ruta_cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.ruta_cache.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._huellas, f)
+        os.replace(tmp, self.ruta_cache)
+
+
+def _esperar(futuro, ruta) -> bool:
+    if futuro is None:
+        return True
+    try:
+        futuro.result()
+        return True
+    except Exception as e:
+        print(f"❌ Error al generar {os.path.basename(ruta)}: {e}")
+        return False
+
+
+def _terminar_archivo(fn, hojas_out, salida, encargos):
+    """Escribe el libro en cuanto su gráfico está listo y espera al resto de sus imágenes."""
+    (futuro_grafico, ruta_grafico), *tablas = encargos
+    grafico_ok = _esperar(futuro_grafico, ruta_grafico)
+    guardar_hojas(hojas_out, salida, imagen_stats=ruta_grafico if grafico_ok else None)
+    for futuro, ruta in tablas:
+        _esperar(futuro, ruta)
+    print(f"✅ Guardado → {salida}\n")
+
 
-        print(f"✅ Guardado → {salida}\n")
+def main():
+    matcher = ExclusionMatcher.desde_carpeta(EXCLUSIONES_FOLDER)
+    print(f"📋 Cargadas {len(matcher)} palabras de exclusión\n")
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+    renderizador = RenderizadorImagenes()
+    # Libros cuyas imágenes se están dibujando; se escriben por orden mientras se leen los siguientes
+    en_curso = deque()
+    try:
+        for fn in os.listdir(CLEAN_INPUT_FOLDER):
+            if not fn.lower().endswith(".xlsx"):
+                continue
+            entrada = os.path.join(CLEAN_INPUT_FOLDER, fn)
+            salida = os.path.join(OUTPUT_FOLDER, fn)
+
+            print(f"🔄 Procesando: {fn}")
+            hojas_out, estadisticas = procesar_archivo(entrada, matcher)
+
+            # 📊 Ordenar data por reviews
+            df_data = hojas_out[HOJA_DATA]
+            if "reviews" in df_data.columns:
+                df_data["reviews"] = pd.to_numeric(df_data["reviews"], errors="coerce")
+                df_data = df_data.sort_values("reviews", ascending=False)
+                hojas_out[HOJA_DATA] = df_data
+
+            # 📊 Imágenes (estadísticas, data, sectores) en el pool; el Excel espera solo al gráfico
+            encargos = [
+                (renderizador.encargar(trabajo), trabajo[2])
+                for trabajo in imagenes_de_archivo(fn, hojas_out, estadisticas)
+            ]
+            en_curso.append((fn, hojas_out, salida, encargos))
+            while len(en_curso) > MAX_PROCESOS:
+                _terminar_archivo(*en_curso.popleft())
+
+        while en_curso:
+            _terminar_archivo(*en_curso.popleft())
+    finally:
+        renderizador.cerrar()
+    if renderizador.omitidas:
+        print(f"♻️ Imágenes sin cambios reutilizadas: {renderizador.omitidas}")
 
 
 if __name__ == "__main__":
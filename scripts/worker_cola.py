@@ -0,0 +1,109 @@
+"""
+Trabajador de la cola de scraping (modo "cola" de scripts/main.py).
+
+Toma lotes de filas de la cola SQLite compartida, los procesa con la misma lógica que
+el pipeline principal (HTTP, navegador, verificación) y devuelve los resultados.
+Se ejecuta en el mismo host que el coordinador (la cola SQLite en modo WAL no es
+segura sobre sistemas de ficheros de red):
+
+    python scripts/worker_cola.py [--cola RUTA] [--hilos N] [--reparto N]
+
+Con cada lote entrega también sus contadores (caminos de carga, prefiltro, DNS, SMTP...),
+que el coordinador suma para el resumen final. Los límites de cortesía por host e IP se
+reparten entre los `--reparto` trabajadores, para que en conjunto no se multipliquen.
+Termina cuando el coordinador cierra la cola y ya no quedan lotes.
+"""
+
+import sys, os
+# Asegura que Python encuentre el paquete extractor y el pipeline principal
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main as pipeline
+from extractor.dns_cache import DNS_CACHE
+from extractor.host_scheduler import HOST_SCHEDULER
+from extractor.work_queue import WorkQueue, RUTA_COLA, id_trabajador
+
+ESPERA_COLA_VACIA = 2   # Segundos entre consultas cuando no hay lotes
+
+
+def _renovar_periodicamente(cola, id_lote, trabajador, parar: threading.Event):
+    """Mantiene vivo el alquiler del lote mientras el trabajador lo procesa."""
+    while not parar.wait(cola.lease / 3):
+        if not cola.renovar(id_lote, trabajador):
+            return
+
+
+def procesar_lote(cola, id_lote, items, trabajador, executor, previos):
+    """
+    Procesa los items [índice, fila] del lote y entrega [índice, resultado] a la cola,
+    junto con lo que han crecido los contadores del proceso desde `previos`.
+    Retorna los contadores de referencia para el siguiente lote.
+    """
+    parar = threading.Event()
+    latido = threading.Thread(
+        target=_renovar_periodicamente, args=(cola, id_lote, trabajador, parar), daemon=True
+    )
+    latido.start()
+    try:
+        resultados = list(executor.map(lambda item: [item[0], pipeline.procesar_sitio(item[1])], items))
+    except Exception as e:
+        logging.error(f"Lote {id_lote} fallido en {trabajador}: {e}")
+        cola.devolver(id_lote, trabajador)
+        return previos
+    finally:
+        parar.set()
+    actuales = pipeline.contadores_proceso()
+    if not cola.completar(id_lote, trabajador, resultados, dict(actuales - previos)):
+        logging.warning(f"Lote {id_lote}: el alquiler caducó, otro trabajador lo repetirá")
+    return actuales
+
+
+def ejecutar_trabajador(ruta_cola=RUTA_COLA, hilos: int = pipeline.MAX_WORKERS,
+                        reparto: int = pipeline.TRABAJADORES_LOCALES):
+    cola = WorkQueue(ruta_cola)
+    trabajador = id_trabajador()
+    lotes = 0
+    # Cada proceso tiene su propio planificador: su parte de los límites globales
+    HOST_SCHEDULER.max_por_host = max(1, HOST_SCHEDULER.max_por_host // reparto)
+    HOST_SCHEDULER.max_por_ip = max(1, HOST_SCHEDULER.max_por_ip // reparto)
+    if pipeline.DNS_CACHE_PERSISTENTE:
+        DNS_CACHE.activar_persistencia()
+    previos = pipeline.contadores_proceso()
+    print(f"👷 Trabajador {trabajador} esperando lotes en {ruta_cola}")
+    try:
+        with ThreadPoolExecutor(max_workers=hilos) as executor:
+            while True:
+                lote = cola.tomar(trabajador)
+                if lote is None:
+                    if cola.cerrada():
+                        break
+                    time.sleep(ESPERA_COLA_VACIA)
+                    continue
+                id_lote, archivo, items = lote
+                previos = procesar_lote(cola, id_lote, items, trabajador, executor, previos)
+                lotes += 1
+    finally:
+        pipeline._cerrar_browser_pool()
+        if pipeline.SITE_CACHE is not None:
+            pipeline.SITE_CACHE.cerrar()
+        if pipeline.DNS_CACHE_PERSISTENTE:
+            DNS_CACHE.guardar()
+        cola.cerrar()
+    print(f"✅ Trabajador {trabajador}: {lotes} lotes procesados")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Trabajador de la cola de scraping")
+    parser.add_argument("--cola", default=str(RUTA_COLA), help="Ruta del fichero SQLite de la cola (disco local, no una unidad de red)")
+    parser.add_argument("--hilos", type=int, default=pipeline.MAX_WORKERS, help="Sitios simultáneos por trabajador")
+    parser.add_argument("--reparto", type=int, default=pipeline.TRABAJADORES_LOCALES,
+                        help="Trabajadores entre los que se reparten los límites por host e IP")
+    args = parser.parse_args()
+    ejecutar_trabajador(args.cola, args.hilos, args.reparto)
@@ -0,0 +1,86 @@
+"""
+Pruebas de SMTPProber contra un servidor SMTP local de pega (puerto efímero).
+
+    python -m pytest tests
+"""
+
+import sys, os
+# Asegura que Python encuentre el paquete extractor
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from extractor.smtp_probe import SMTPProber
+
+
+class _ServidorSMTP(socketserver.ThreadingTCPServer):
+    """Responde el saludo 220 (con retardo, para solapar sondas) y el QUIT; cuenta conexiones."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, retardo=0.3):
+        super().__init__(("127.0.0.1", 0), _ManejadorSMTP)
+        self.retardo = retardo
+        self.conexiones = 0
+        self._lock = threading.Lock()
+
+
+class _ManejadorSMTP(socketserver.StreamRequestHandler):
+    def handle(self):
+        with self.server._lock:
+            self.server.conexiones += 1
+        time.sleep(self.server.retardo)
+        self.wfile.write(b"220 localhost ESMTP prueba\r\n")
+        for linea in self.rfile:
+            if linea.strip().upper() == b"QUIT":
+                self.wfile.write(b"221 adios\r\n")
+                return
+            self.wfile.write(b"250 ok\r\n")
+
+
+@pytest.fixture
+def servidor():
+    srv = _ServidorSMTP()
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_una_conexion_para_sondas_concurrentes(servidor):
+    prober = SMTPProber(timeout=5, puerto=servidor.server_address[1])
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(prober.probar("127.0.0.1"))) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert resultados == [True] * 8
+    assert servidor.conexiones == 1
+
+
+def test_resultado_memoizado(servidor):
+    prober = SMTPProber(timeout=5, puerto=servidor.server_address[1])
+    assert prober.probar("127.0.0.1") is True
+    assert prober.probar("127.0.0.1.") is True   # mismo host normalizado
+    assert servidor.conexiones == 1
+    assert prober.estadisticas() == {'hosts': 1, 'activos': 1}
+
+    prober.olvidar("127.0.0.1")
+    assert prober.probar("127.0.0.1") is True
+    assert servidor.conexiones == 2
+
+
+def test_puerto_cerrado():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+    prober = SMTPProber(timeout=2, puerto=puerto)
+    assert prober.probar("127.0.0.1") is False
+    assert prober.estadisticas() == {'hosts': 1, 'activos': 0}